@@ -0,0 +1,115 @@
+from typing import Union
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+import weakref
+import numpy as np
+from rasters import Raster, RasterGeometry, RasterGrid
+
+from geos5fp import GEOS5FP
+
+# number of GEOS-5 FP rasters to keep in memory between calls
+GEOS5FP_CACHE_SIZE = 32
+
+_GEOS5FP_cache = OrderedDict()
+
+def _copy(image: Union[Raster, np.ndarray]) -> Union[Raster, np.ndarray]:
+    # writable copy of a cached raster
+    if isinstance(image, Raster):
+        return image.contain(image.array.copy())
+
+    return image.copy() if isinstance(image, np.ndarray) else image
+
+@lru_cache(maxsize=1)
+def default_GEOS5FP_connection() -> GEOS5FP:
+    """
+    Get the GEOS-5 FP connection shared by PT-JPL runs that aren't given one.
+
+    The connection is created once, so repeated runs reuse its download directory and state.
+    """
+    return GEOS5FP()
+
+def retrieve_GEOS5FP(
+        GEOS5FP_connection: GEOS5FP,
+        variable: str,
+        time_UTC: datetime,
+        geometry: RasterGeometry,
+        resampling: str,
+        copy: bool = True) -> Union[Raster, np.ndarray]:
+    """
+    Retrieve a GEOS-5 FP variable, reusing the result of an earlier request for the same time and target grid.
+
+    Time series of runs over the same scene request the same variables for the same times,
+    so results for regular grids are kept in a small least-recently-used cache instead of being opened again.
+    The cache holds read-only rasters and only a weak reference to the connection,
+    so it doesn't keep connections alive, and callers get a writable copy unless `copy` is false.
+
+    Parameters:
+    GEOS5FP_connection (GEOS5FP): Connection to retrieve from.
+    variable (str): Name of the connection method for the variable, such as "Ta_C", "RH", or "SWin".
+    time_UTC (datetime): Time of the request in UTC.
+    geometry (RasterGeometry): Target geometry.
+    resampling (str): Resampling method.
+    copy (bool, optional): Return a writable copy of the cached raster. Defaults to True,
+        false returns the shared read-only raster for callers that don't modify it.
+
+    Returns:
+    Union[Raster, np.ndarray]: The variable resampled to the target geometry.
+    """
+    def retrieve():
+        return getattr(GEOS5FP_connection, variable)(
+            time_UTC=time_UTC,
+            geometry=geometry,
+            resampling=resampling
+        )
+
+    if not isinstance(geometry, RasterGrid):
+        return retrieve()
+
+    # connections that can't be weakly referenced aren't cached
+    try:
+        connection = weakref.ref(GEOS5FP_connection)
+    except TypeError:
+        return retrieve()
+
+    # the cache is keyed on the identity of the connection rather than the connection itself,
+    # and entries of a connection that has been collected, whose id may have been reused, are ignored
+    key = (
+        id(GEOS5FP_connection),
+        variable,
+        time_UTC.isoformat() if isinstance(time_UTC, datetime) else str(time_UTC),
+        tuple(geometry.affine),
+        geometry.rows,
+        geometry.cols,
+        geometry.crs.to_wkt(),
+        resampling
+    )
+
+    if key in _GEOS5FP_cache and _GEOS5FP_cache[key][0]() is GEOS5FP_connection:
+        _GEOS5FP_cache.move_to_end(key)
+        image = _GEOS5FP_cache[key][1]
+
+        return _copy(image) if copy else image
+
+    image = retrieve()
+
+    # the cached raster is shared between callers, so protect it from modification
+    if isinstance(image, Raster):
+        image.array.flags.writeable = False
+    elif isinstance(image, np.ndarray):
+        image.flags.writeable = False
+
+    _GEOS5FP_cache[key] = (connection, image)
+    _GEOS5FP_cache.move_to_end(key)
+
+    if len(_GEOS5FP_cache) > GEOS5FP_CACHE_SIZE:
+        _GEOS5FP_cache.popitem(last=False)
+
+    return _copy(image) if copy else image
+
+def clear_GEOS5FP_cache():
+    """
+    Drop the cached GEOS-5 FP rasters and the shared default connection, for long-running processes.
+    """
+    _GEOS5FP_cache.clear()
+    default_GEOS5FP_connection.cache_clear()
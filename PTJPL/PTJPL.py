@@ -1,43 +1,40 @@
-from typing import Union, Dict
-import warnings
+from typing import Union, Dict, Tuple
 import numpy as np
-import pandas as pd
 from datetime import datetime
 
-import rasters as rt
-from rasters import Raster, RasterGeometry
+from rasters import Raster
 
 from geos5fp import GEOS5FP
 
 from .constants import *
 
-from .meteorology_conversion import SVP_Pa_from_Ta_C
-
 from .priestley_taylor import GAMMA_PA
-from .priestley_taylor import delta_Pa_from_Ta_C
-
-from .vegetation_conversion import LAI_from_NDVI
-from .vegetation_conversion import SAVI_from_NDVI
-from .vegetation_conversion import fAPAR_from_SAVI
-from .vegetation_conversion import fIPAR_from_NDVI
-
-from .partitioning import calculate_relative_surface_wetness
-from .partitioning import calculate_green_canopy_fraction
-from .partitioning import calculate_plant_moisture_constraint
-from .partitioning import calculate_soil_moisture_constraint
-from .partitioning import calculate_plant_temperature_constraint
-
-from .partitioning import calculate_soil_net_radiation
-from .partitioning import calculate_soil_latent_heat_flux
-from .partitioning import calculate_canopy_latent_heat_flux
-from .partitioning import calculate_interception
 
 from .fAPARmax import load_fAPARmax
 from .Topt import load_Topt
 
-from .net_radiation.verma_net_radiation import process_verma_net_radiation, daily_Rn_integration_verma
+from .net_radiation.verma_net_radiation import process_verma_net_radiation
 from .soil_heat_flux.calculate_SEBAL_soil_heat_flux import calculate_SEBAL_soil_heat_flux
 
+from .precision import DEFAULT_DTYPE
+
+from .GEOS5FP_inputs import default_GEOS5FP_connection, retrieve_GEOS5FP
+
+from .kernel import OUTPUT_NAMES, scratch_buffer, flatten_inputs, _ptjpl_kernel
+from .kernel_cuda import is_cupy_array, process_PTJPL_CUDA
+from .kernel_dask import is_dask_array, process_PTJPL_dask
+
+
+def _unwrap(array: Union[Raster, np.ndarray, float], dtype: type = None) -> Union[np.ndarray, float]:
+    # underlying array of a raster in the given dtype, scalars, device arrays, and lazy arrays are passed through
+    if isinstance(array, Raster):
+        array = array.array
+
+    if dtype is not None and isinstance(array, np.ndarray):
+        array = array.astype(dtype, copy=False)
+
+    return array
+
 
 def PTJPL(
         NDVI: Union[Raster, np.ndarray],
@@ -61,7 +58,17 @@ def PTJPL(
         beta_Pa: float = BETA_PA,
         PT_alpha: float = PT_ALPHA,
         minimum_Topt: float = MINIMUM_TOPT,
-        floor_Topt: bool = FLOOR_TOPT) -> Dict[str, np.ndarray]:
+        floor_Topt: bool = FLOOR_TOPT,
+        scratch: Dict[str, np.ndarray] = None,
+        chunks: Tuple[int, ...] = None,
+        dtype: type = DEFAULT_DTYPE) -> Dict[str, np.ndarray]:
+    # passing the same scratch dictionary to repeated runs over scenes of the same shape
+    # reuses the converted inputs and the output arrays, so outputs of the previous run are overwritten
+    # passing chunks, such as (2048, 2048), runs the partitioning block by block through Dask,
+    # so the kernel's temporaries stay the size of a block
+    # the whole pipeline runs in single precision by default, passing dtype=np.float64 runs it in double precision
+    # single precision outputs stay within about 1e-3 W/m^2 of double precision for net radiation up to 1000 W/m^2,
+    # so the relative difference is only larger on fluxes that are themselves close to zero
     results = {}
 
     if geometry is None and isinstance(NDVI, Raster):
@@ -74,35 +81,56 @@ def PTJPL(
         fAPARmax = load_fAPARmax(geometry)
 
     if GEOS5FP_connection is None:
-        GEOS5FP_connection = GEOS5FP()
+        GEOS5FP_connection = default_GEOS5FP_connection()
 
+    # the GEOS-5 FP inputs are only read, so the shared read-only rasters of the cache are used without copying
     if Ta_C is None and geometry is not None and datetime_UTC is not None:
-        Ta_C = GEOS5FP_connection.Ta_C(
+        Ta_C = retrieve_GEOS5FP(
+            GEOS5FP_connection,
+            "Ta_C",
             time_UTC=datetime_UTC,
             geometry=geometry,
-            resampling=resampling
+            resampling=resampling,
+            copy=False
         )
 
     if Ta_C is None:
         raise ValueError("air temperature (Ta_C) not given")
     
     if RH is None and geometry is not None and datetime_UTC is not None:
-        RH = GEOS5FP_connection.RH(
+        RH = retrieve_GEOS5FP(
+            GEOS5FP_connection,
+            "RH",
             time_UTC=datetime_UTC,
             geometry=geometry,
-            resampling=resampling
+            resampling=resampling,
+            copy=False
         )
 
     if RH is None:
         raise ValueError("relative humidity (RH) not given")
 
+    # keep the geometry of any raster input for the outputs,
+    # then do the remaining math on the underlying arrays so intermediate results aren't wrapped as rasters
+    if geometry is None:
+        geometry = next((array.geometry for array in (Ta_C, RH, Rn, G, Topt, fAPARmax) if isinstance(array, Raster)), None)
+
+    NDVI, ST_C, emissivity, albedo, Rn, Ta_C, RH, SWin, G, Topt, fAPARmax, delta_Pa, gamma_Pa, epsilon = [
+        _unwrap(array, dtype)
+        for array
+        in (NDVI, ST_C, emissivity, albedo, Rn, Ta_C, RH, SWin, G, Topt, fAPARmax, delta_Pa, gamma_Pa, epsilon)
+    ]
+
     if Rn is None and albedo is not None and ST_C is not None and emissivity is not None:
         if SWin is None and geometry is not None and datetime_UTC is not None:
-            SWin = GEOS5FP_connection.SWin(
+            SWin = _unwrap(retrieve_GEOS5FP(
+                GEOS5FP_connection,
+                "SWin",
                 time_UTC=datetime_UTC,
                 geometry=geometry,
-                resampling=resampling
-            )
+                resampling=resampling,
+                copy=False
+            ), dtype)
 
         Rn_results = process_verma_net_radiation(
             SWin=SWin,
@@ -110,7 +138,8 @@ def PTJPL(
             ST_C=ST_C,
             emissivity=emissivity,
             Ta_C=Ta_C,
-            RH=RH
+            RH=RH,
+            return_components=False
         )
 
         Rn = Rn_results["Rn"]
@@ -129,127 +158,116 @@ def PTJPL(
     if G is None:
         raise ValueError("soil heat flux (G) not given")
 
-    # calculate meteorology
-
-    # calculate saturation vapor pressure in kPa from air temperature in celsius
-    # floor saturation vapor pressure at 1
-    SVP_Pa = SVP_Pa_from_Ta_C(Ta_C)
-
-    # constrain relative humidity between 0 and 1
-    RH = rt.clip(RH, 0, 1)
-
-    # calculate water vapor pressure in Pascals from relative humidity and saturation vapor pressure
-    Ea_Pa = RH * SVP_Pa
-
-    # calculate vapor pressure deficit from water vapor pressure
-    VPD_Pa = rt.clip(SVP_Pa - Ea_Pa, 0, None)
-
-    # calculate relative surface wetness from relative humidity
-    fwet = calculate_relative_surface_wetness(RH)
-
-    # calculate vegetation values
-
-    # convert normalized difference vegetation index to soil-adjusted vegetation index
-    SAVI = SAVI_from_NDVI(NDVI)
-
-    # calculate fraction of absorbed photosynthetically active radiation from soil-adjusted vegetation index
-    fAPAR = fAPAR_from_SAVI(SAVI)
-
-    # calculate fIPAR from NDVI
-    fIPAR = fIPAR_from_NDVI(NDVI)
-
-    # replace zero fIPAR with NaN
-    fIPAR = np.where(fIPAR == 0, np.nan, fIPAR)
-
-    # calculate green canopy fraction (fg) from fAPAR and fIPAR, constrained between zero and one
-    fg = calculate_green_canopy_fraction(fAPAR, fIPAR)
-
-    # calculate plant moisture constraint (fM) from fraction of photosynthetically active radiation, constrained between zero and one
-    fM = calculate_plant_moisture_constraint(fAPAR, fAPARmax)
-
-    # calculate soil moisture constraint from mean relative humidity and vapor pressure deficit, constrained between zero and one
-    fSM = calculate_soil_moisture_constraint(RH, VPD_Pa, beta_Pa=beta_Pa)
-
-    # apply corrections to optimum temperature
-
-    if floor_Topt:
-        # when Topt exceeds observed air temperature, then set Topt to match air temperature
-        Topt = rt.where(Ta_C > Topt, Ta_C, Topt)
-
-    Topt = rt.clip(Topt, minimum_Topt, None)
-
-    # calculate plant temperature constraint (fT) from optimal phenology
-    fT = calculate_plant_temperature_constraint(Ta_C, Topt)
-
-    LAI = LAI_from_NDVI(NDVI)
-
-    # calculate delta / (delta + gamma) term if it's not given
-    if epsilon is None:
-        # calculate delta if it's not given
-        if delta_Pa is None:
-            # calculate slope of saturation to vapor pressure curve in kiloPascal per degree Celsius
-            delta_Pa = delta_Pa_from_Ta_C(Ta_C)
-
-        # calculate delta / (delta + gamma)
+    # calculate delta / (delta + gamma) up front only when delta is given without epsilon,
+    # otherwise the kernel calculates it per pixel from air temperature
+    if epsilon is None and delta_Pa is not None:
         epsilon = delta_Pa / (delta_Pa + gamma_Pa)
 
-    # soil evaporation
-
-    # caluclate net radiation of the soil from leaf area index
-    Rn_soil = calculate_soil_net_radiation(Rn, LAI)
-    results["Rn_soil"] = Rn_soil
-
-    # calculate soil evaporation (LEs) from relative surface wetness, soil moisture constraint,
-    # priestley taylor coefficient, epsilon = delta / (delta + gamma), net radiation of the soil,
-    # and soil heat flux
-    LE_soil = calculate_soil_latent_heat_flux(Rn_soil, G, epsilon, fwet, fSM, PT_alpha)
-    results["LE_soil"] = LE_soil
-
-    # canopy transpiration
-
-    # calculate net radiation of the canopy from net radiation of the soil
-    Rn_canopy = Rn - Rn_soil
-    results["Rn_canopy"] = Rn_canopy
-
-    # calculate potential evapotranspiration (pET) from net radiation, and soil heat flux
-    PET = PT_alpha * epsilon * (Rn - G)
-    results["PET"] = PET
-
-    # calculate canopy transpiration (LEc) from priestley taylor, relative surface wetness,
-    # green canopy fraction, plant temperature constraint, plant moisture constraint,
-    # epsilon = delta / (delta + gamma), and net radiation of the canopy
-    LE_canopy = calculate_canopy_latent_heat_flux(
-        Rn_canopy=Rn_canopy,
-        epsilon=epsilon,
-        fwet=fwet,
-        fg=fg,
-        fT=fT,
-        fM=fM,
-        PT_alpha=PT_alpha
-    )
-
-    results["LE_canopy"] = LE_canopy
-
-    # interception evaporation
+    # inputs resident on the GPU run through the fused CuPy kernel and stay on the device
+    if is_cupy_array(NDVI, Ta_C, RH, Rn, G, Topt, fAPARmax):
+        results.update(process_PTJPL_CUDA(
+            NDVI=NDVI,
+            Ta_C=Ta_C,
+            RH=RH,
+            Rn=Rn,
+            G=G,
+            Topt=Topt,
+            fAPARmax=fAPARmax,
+            epsilon=epsilon,
+            gamma_Pa=gamma_Pa,
+            beta_Pa=beta_Pa,
+            PT_alpha=PT_alpha,
+            minimum_Topt=minimum_Topt,
+            floor_Topt=floor_Topt,
+            output_names=OUTPUT_NAMES,
+            dtype=dtype
+        ))
+
+        return results
+
+    # inputs already split into Dask blocks stay lazy, in-memory inputs with chunks requested are computed block by block
+    if chunks is not None or is_dask_array(NDVI, Ta_C, RH, Rn, G, Topt, fAPARmax, gamma_Pa, epsilon):
+        lazy = is_dask_array(NDVI, Ta_C, RH, Rn, G, Topt, fAPARmax, gamma_Pa, epsilon)
+
+        outputs = process_PTJPL_dask(
+            NDVI=NDVI,
+            Ta_C=Ta_C,
+            RH=RH,
+            Rn=Rn,
+            G=G,
+            Topt=Topt,
+            fAPARmax=fAPARmax,
+            epsilon=epsilon,
+            gamma_Pa=gamma_Pa,
+            beta_Pa=beta_Pa,
+            PT_alpha=PT_alpha,
+            minimum_Topt=minimum_Topt,
+            floor_Topt=floor_Topt,
+            output_names=OUTPUT_NAMES,
+            chunks=chunks,
+            dtype=dtype,
+            compute=not lazy
+        )
 
-    # calculate interception evaporation (LEi) from relative surface wetness and net radiation of the canopy
-    LE_interception = calculate_interception(
-        Rn_canopy=Rn_canopy,
-        epsilon=epsilon,
-        fwet=fwet,
-        PT_alpha=PT_alpha
+        for name, array in outputs.items():
+            # wrap computed outputs matching the target geometry as rasters
+            if not lazy and geometry is not None and array.shape == geometry.shape:
+                array = Raster(array, geometry=geometry)
+
+            results[name] = array
+
+        return results
+
+    epsilon_given = epsilon is not None
+
+    # remote sensing inputs don't carry double precision, so the default single precision halves the bytes streamed
+    shape, (NDVI, Ta_C, RH, Rn, G, Topt, fAPARmax, gamma_Pa, epsilon) = flatten_inputs(
+        NDVI,
+        Ta_C,
+        RH,
+        Rn,
+        G,
+        Topt,
+        fAPARmax,
+        gamma_Pa,
+        epsilon if epsilon_given else 0.0,
+        dtype=dtype,
+        scratch=scratch,
+        uniform=(7, 8)
     )
 
-    results["LE_interception"] = LE_interception
+    # the outputs are the rows of one stacked buffer, so all bands of a scene sit in a single contiguous allocation
+    # that can be written out band-sequentially in one go
+    stacked = scratch_buffer(scratch, "outputs", len(OUTPUT_NAMES) * NDVI.size, dtype).reshape(len(OUTPUT_NAMES), NDVI.size)
+    outputs = dict(zip(OUTPUT_NAMES, stacked))
+
+    # calculate meteorology, vegetation, constraints, and partitioned latent heat flux in a single pass over the pixels,
+    # with the scalar parameters in the precision of the arrays
+    _ptjpl_kernel(
+        NDVI,
+        Ta_C,
+        RH,
+        Rn,
+        G,
+        Topt,
+        fAPARmax,
+        epsilon,
+        epsilon_given,
+        gamma_Pa,
+        np.dtype(dtype).type(beta_Pa),
+        np.dtype(dtype).type(PT_alpha),
+        np.dtype(dtype).type(minimum_Topt),
+        bool(floor_Topt),
+        *outputs.values()
+    )
 
-    # combined evapotranspiration
+    for name, array in outputs.items():
+        array = array.reshape(shape)
 
-    # combine soil evaporation (LEs), canopy transpiration (LEc), and interception evaporation (LEi)
-    # into instantaneous evapotranspiration (LE)
-    LE = LE_soil + LE_canopy + LE_interception
+        # wrap outputs matching the target geometry as rasters
+        if geometry is not None and shape == geometry.shape:
+            array = Raster(array, geometry=geometry)
 
-    # constrain instantaneous evapotranspiration between zero and potential evapotranspiration
-    LE = np.clip(LE, 0, PET)
-    results["LE"] = LE
+        results[name] = array
 
     return results
@@ -3,10 +3,10 @@ import numpy as np
 import rasters as rt
 from rasters import Raster, RasterGeometry
 
+from .static_raster import load_static_raster
+
 def load_Topt(geometry: RasterGeometry) -> Raster:
     SCALE_FACTOR = 0.01
     filename = join(abspath(dirname(__file__)), "Topt_mean_CMG_int16.tif")
-    image = rt.clip(rt.Raster.open(filename, geometry=geometry, resampling="cubic") * SCALE_FACTOR, 0, None)
-    image.nodata = np.nan
 
-    return image
\ No newline at end of file
+    return load_static_raster(filename, geometry, SCALE_FACTOR)
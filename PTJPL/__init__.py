@@ -1,4 +1,7 @@
 from .PTJPL import *
+from .net_radiation.verma_net_radiation import daily_Rn_integration_verma
+from .static_raster import clear_static_raster_cache
+from .GEOS5FP_inputs import clear_GEOS5FP_cache
 
 from os.path import join, abspath, dirname
 
@@ -0,0 +1,141 @@
+from typing import Union
+import os
+from functools import lru_cache
+import numpy as np
+from rasters import Raster
+
+# numexpr is optional, expressions fall back to NumPy when it's not installed
+try:
+    import numexpr as ne
+except ImportError:
+    ne = None
+
+@lru_cache(maxsize=1)
+def _numexpr_threads() -> Union[int, None]:
+    # numexpr caps its default thread count below the core count of large machines,
+    # so use every core for the raster expressions unless the thread count is configured in the environment
+    if any(os.environ.get(name) for name in ("NUMEXPR_NUM_THREADS", "NUMEXPR_MAX_THREADS", "OMP_NUM_THREADS")):
+        return None
+
+    return min(ne.detect_number_of_cores(), ne.MAX_THREADS)
+
+# NumPy equivalents of the numexpr functions used in PT-JPL expressions
+NUMPY_FUNCTIONS = {
+    "where": np.where,
+    "exp": np.exp,
+    "expm1": np.expm1,
+    "log": np.log,
+    "log1p": np.log1p,
+    "sqrt": np.sqrt,
+    "abs": np.abs
+}
+
+def clip_in_place(
+        array: Union[Raster, np.ndarray],
+        lower: float = None,
+        upper: float = None) -> Union[Raster, np.ndarray]:
+    """
+    Clip a freshly calculated array or Raster in place, without allocating an output array.
+
+    Only pass arrays that the caller owns, such as the result of an arithmetic expression.
+    Scalars, read-only arrays, and non-floating arrays are clipped into a new array instead.
+    NaN is passed through.
+
+    Parameters:
+    array (Union[Raster, np.ndarray]): Raster or array to clip.
+    lower (float, optional): Lower bound, or None to leave values unbounded below.
+    upper (float, optional): Upper bound, or None to leave values unbounded above.
+
+    Returns:
+    Union[Raster, np.ndarray]: The clipped input.
+    """
+    if lower is None and upper is None:
+        return array
+
+    values = array.array if isinstance(array, Raster) else array
+
+    if (
+            not isinstance(values, np.ndarray)
+            or values.ndim == 0
+            or not values.flags.writeable
+            or not np.issubdtype(values.dtype, np.floating)):
+        clipped = np.clip(values, lower, upper)
+
+        return array.contain(clipped) if isinstance(array, Raster) else clipped
+
+    np.clip(values, lower, upper, out=values)
+
+    return array
+
+def evaluate(
+        expression: str,
+        lower: float = None,
+        upper: float = None,
+        out: Union[Raster, np.ndarray] = None,
+        **arrays) -> Union[Raster, np.ndarray]:
+    """
+    Evaluate an element-wise expression in a single fused, multi-threaded pass using numexpr.
+
+    numexpr streams the inputs in cache-sized blocks without materializing the intermediate arrays of the expression.
+    When numexpr is not installed, the same expression is evaluated with NumPy.
+    If any input is a Raster, the result is wrapped in the geometry of the first Raster input.
+
+    Parameters:
+    expression (str): numexpr expression over the names of the keyword arguments.
+    lower (float, optional): Lower bound to clip the result to in place. NaN is passed through.
+    upper (float, optional): Upper bound to clip the result to in place. NaN is passed through.
+    out (Union[Raster, np.ndarray], optional): Preallocated array or Raster of the result's shape to write the result into.
+    **arrays: Raster, ndarray, or scalar values referenced by the expression.
+
+    Returns:
+    Union[Raster, np.ndarray]: The result of the expression.
+    """
+    geometry = next((value.geometry for value in arrays.values() if isinstance(value, Raster)), None)
+    values = {name: value.array if isinstance(value, Raster) else value for name, value in arrays.items()}
+    array_values = [value for value in values.values() if isinstance(value, np.ndarray)]
+
+    # numexpr treats Python floats as double precision, which would promote single precision arrays,
+    # so scalar arguments take the floating dtype of the array arguments the way they do in NumPy
+    if array_values:
+        dtype = np.result_type(*array_values)
+
+        if np.issubdtype(dtype, np.floating):
+            values = {
+                name: dtype.type(value) if isinstance(value, float) else value
+                for name, value
+                in values.items()
+            }
+
+    out_array = out.array if isinstance(out, Raster) else out
+
+    if ne is not None:
+        # the thread count is only set for PT-JPL's own expressions and restored afterwards,
+        # so numexpr's process-wide configuration for other libraries is left as it was
+        threads = _numexpr_threads()
+        previous = ne.set_num_threads(threads) if threads is not None else None
+
+        try:
+            result = ne.evaluate(expression, local_dict=values, out=out_array)
+        finally:
+            if previous is not None:
+                ne.set_num_threads(previous)
+    else:
+        result = np.asarray(eval(expression, {"__builtins__": {}, **NUMPY_FUNCTIONS}, values))
+
+        if out_array is not None:
+            np.copyto(out_array, result, casting="same_kind")
+            result = out_array
+
+    result = clip_in_place(result, lower, upper)
+
+    if isinstance(out, Raster):
+        return out
+
+    # scalar inputs give scalar results, as they do in NumPy
+    if np.ndim(result) == 0:
+        return result[()]
+
+    if geometry is not None:
+        result = Raster(result, geometry=geometry)
+
+    return result
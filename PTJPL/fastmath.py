@@ -0,0 +1,28 @@
+from numba import types
+from numba.extending import overload
+from numba.np.numpy_support import as_dtype
+
+# fast-math flags shared by the compiled kernels and ufuncs
+# "nnan" and "ninf" are left out on purpose so that fill values propagate through the pixel math as NaN
+FASTMATH_FLAGS = {"nsz", "arcp", "contract", "afn", "reassoc"}
+
+
+def typed_like(x: float, value: float) -> float:
+    """
+    Convert a constant to the floating point type of x.
+
+    In compiled code, Python float constants are double precision and promote single precision math,
+    so constants are passed through this to keep float32 pixels in float32 and to compare in the input precision.
+    """
+    return type(x)(value)
+
+
+@overload(typed_like)
+def _typed_like(x, value):
+    if isinstance(x, types.Float):
+        dtype = as_dtype(x).type
+
+        def implementation(x, value):
+            return dtype(value)
+
+        return implementation
@@ -0,0 +1,317 @@
+from typing import Dict, List, Tuple
+import math
+import numpy as np
+from numba import njit, prange
+from numba import types, void, boolean, float32, float64
+
+from .constants import KRN
+from .meteorology_conversion.meteorology_conversion import SVP_A_KPA, SVP_B, SVP_C
+from .priestley_taylor.priestley_taylor import DELTA_A, DELTA_B_KPA, DELTA_E
+from .vegetation_conversion.vegetation_conversion import KPAR, MIN_FIPAR, MAX_FIPAR, MIN_LAI, MAX_LAI, FAPAR_SLOPE, FAPAR_INTERCEPT, FIPAR_NDVI_OFFSET
+from .fastmath import FASTMATH_FLAGS, typed_like
+
+
+def scratch_buffer(scratch: Dict[str, np.ndarray], name: str, size: int, dtype: type) -> np.ndarray:
+    """
+    Get a flat buffer from a scratch dictionary, allocating it only when it's missing or doesn't match in size or dtype.
+
+    Passing the same scratch dictionary to repeated runs over scenes of the same shape
+    reuses the buffers instead of allocating fresh raster-sized arrays on every call.
+
+    Parameters:
+    scratch (Dict[str, np.ndarray]): Dictionary of buffers to reuse, or None to always allocate.
+    name (str): Name of the buffer in the dictionary.
+    size (int): Number of elements in the buffer.
+    dtype (type): Data type of the buffer.
+
+    Returns:
+    np.ndarray: Uninitialized one-dimensional buffer.
+    """
+    if scratch is None:
+        return np.empty(size, dtype=dtype)
+
+    buffer = scratch.get(name)
+
+    if buffer is None or buffer.size != size or buffer.dtype != dtype:
+        buffer = np.empty(size, dtype=dtype)
+        scratch[name] = buffer
+
+    return buffer
+
+
+def flatten_inputs(
+        *arrays,
+        dtype: type = np.float32,
+        scratch: Dict[str, np.ndarray] = None,
+        uniform: Tuple[int, ...] = ()) -> Tuple[tuple, List[np.ndarray]]:
+    """
+    Precondition kernel inputs by broadcasting them to a common shape and flattening them
+    into C-contiguous arrays of a single dtype.
+
+    Inputs that arrive as strided views, such as slices of rasters, as scalars, or in another dtype
+    are copied once here, so the kernel streams each input with unit stride.
+    Inputs that are already contiguous in the requested dtype are passed through without copying.
+
+    Parameters:
+    *arrays: Raster, ndarray, or scalar inputs to broadcast together.
+    dtype (type, optional): Data type of the flattened arrays. Defaults to float32.
+    scratch (Dict[str, np.ndarray], optional): Dictionary of buffers to copy inputs into, see `scratch_buffer`.
+    uniform (Tuple[int, ...], optional): Positions of inputs the kernel can read as a single value for every pixel.
+        These are returned as one-element arrays when they hold a single value, instead of being broadcast.
+
+    Returns:
+    Tuple[tuple, List[np.ndarray]]: The broadcast shape and the flattened arrays in the order given.
+    """
+    arrays = [np.asarray(array) for array in arrays]
+    shape = np.broadcast_shapes(*[array.shape for array in arrays])
+    flattened = []
+
+    for index, array in enumerate(arrays):
+        if index in uniform and array.size == 1:
+            flattened.append(array.astype(dtype).reshape(1))
+            continue
+
+        array = np.broadcast_to(array, shape)
+
+        if array.dtype == dtype and array.flags.c_contiguous:
+            flattened.append(array.ravel())
+        else:
+            buffer = scratch_buffer(scratch, f"input_{index}", array.size, dtype)
+            np.copyto(buffer.reshape(shape), array)
+            flattened.append(buffer)
+
+    return shape, flattened
+
+
+@njit(fastmath=FASTMATH_FLAGS, error_model="numpy", cache=True)
+def _clip(x: float, lower: float, upper: float) -> float:
+    # element-wise equivalent of np.clip that passes NaN through
+    if x < lower:
+        x = lower
+    if x > upper:
+        x = upper
+
+    return x
+
+
+@njit(fastmath=FASTMATH_FLAGS, error_model="numpy", cache=True)
+def _clip_lower(x: float, lower: float) -> float:
+    # one-sided clip that passes NaN through, lowered to a single compare and select
+    return lower if x < lower else x
+
+
+@njit(fastmath=FASTMATH_FLAGS, error_model="numpy", cache=True)
+def _clip_upper(x: float, upper: float) -> float:
+    # one-sided clip that passes NaN through, lowered to a single compare and select
+    return upper if x > upper else x
+
+
+@njit(fastmath=FASTMATH_FLAGS, error_model="numpy", cache=True)
+def _SVP_and_delta_Pa_from_Ta_C(Ta_C: float) -> Tuple[float, float]:
+    # saturation vapor pressure, floored at one kiloPascal, and the slope of the saturation vapor pressure curve in Pascal,
+    # as in SVP_and_delta_Pa_from_Ta_C, with their shared exponential evaluated once in the precision of Ta_C
+    exponential = math.exp((Ta_C * typed_like(Ta_C, SVP_B)) / (Ta_C + typed_like(Ta_C, SVP_C)))
+    SVP_kPa = typed_like(Ta_C, SVP_A_KPA) * exponential
+    one = typed_like(Ta_C, 1.0)
+
+    if SVP_kPa < one:
+        SVP_kPa = one
+
+    offset = Ta_C + typed_like(Ta_C, DELTA_E)
+    delta_kPa = typed_like(Ta_C, DELTA_A) * (typed_like(Ta_C, DELTA_B_KPA) * exponential) / (offset * offset)
+    thousand = typed_like(Ta_C, 1000.0)
+
+    return SVP_kPa * thousand, delta_kPa * thousand
+
+
+# names of the output arrays in the order they're written by the kernel
+OUTPUT_NAMES = [
+    "Rn_soil",
+    "LE_soil",
+    "Rn_canopy",
+    "PET",
+    "LE_canopy",
+    "LE_interception",
+    "LE"
+]
+
+
+def _kernel_signature(dtype) -> void:
+    # seven input arrays, epsilon, its flag, gamma, four scalar parameters, and an output array for each output name
+    # inputs are declared read-only so both writable and read-only arrays, such as cached static rasters, are accepted
+    # and the scalar parameters share the precision of the arrays, so float32 pixels are calculated in float32
+    inputs = types.Array(dtype, 1, "C", readonly=True)
+    outputs = dtype[::1]
+
+    return void(*[inputs] * 7, inputs, boolean, inputs, dtype, dtype, dtype, boolean, *[outputs] * len(OUTPUT_NAMES))
+
+
+# explicit signatures compile the kernel eagerly at import, or load it from the on-disk cache,
+# so worker processes forked after import never pay JIT cost on their first call
+KERNEL_SIGNATURES = [_kernel_signature(float32), _kernel_signature(float64)]
+
+
+# the pixel loop is spread across Numba's threading layer (TBB or OpenMP when available) with the GIL released,
+# so other Python threads keep running while a scene is processed, and bounds checks are kept out of the loop
+@njit(
+    KERNEL_SIGNATURES,
+    parallel=True,
+    nogil=True,
+    boundscheck=False,
+    fastmath=FASTMATH_FLAGS,
+    error_model="numpy",
+    cache=True
+)
+def _ptjpl_kernel(
+        NDVI: np.ndarray,
+        Ta_C: np.ndarray,
+        RH: np.ndarray,
+        Rn: np.ndarray,
+        G: np.ndarray,
+        Topt: np.ndarray,
+        fAPARmax: np.ndarray,
+        epsilon: np.ndarray,
+        epsilon_given: bool,
+        gamma_Pa: np.ndarray,
+        beta_Pa: float,
+        PT_alpha: float,
+        minimum_Topt: float,
+        floor_Topt: bool,
+        out_Rn_soil: np.ndarray,
+        out_LE_soil: np.ndarray,
+        out_Rn_canopy: np.ndarray,
+        out_PET: np.ndarray,
+        out_LE_canopy: np.ndarray,
+        out_LE_interception: np.ndarray,
+        out_LE: np.ndarray):
+    """
+    Fused per-pixel PT-JPL partitioning over flattened input arrays.
+
+    Each pixel is carried from meteorology through the final latent heat flux in scalar temporaries,
+    so only the output arrays are written to memory.
+    This reproduces the element-wise chain of the partitioning, vegetation conversion,
+    meteorology conversion, and Priestley-Taylor helpers, including their NaN behavior.
+    `epsilon` is only read when `epsilon_given` is true, otherwise it is calculated from `Ta_C` and `gamma_Pa`.
+    `epsilon` and `gamma_Pa` are either one value per pixel or a single value for the whole scene.
+    """
+    # constants in the precision of the arrays, since Python floats would promote float32 pixels to float64
+    # and comparisons such as fIPAR == 0 need to be made in the precision of the inputs
+    T = NDVI.dtype.type
+    zero = T(0.0)
+    one = T(1.0)
+    tiny = T(1e-30)
+    nan = T(np.nan)
+    fAPAR_slope = T(FAPAR_SLOPE)
+    fAPAR_intercept = T(FAPAR_INTERCEPT)
+    fIPAR_offset = T(FIPAR_NDVI_OFFSET)
+    max_fIPAR_NDVI = T(1.0 - FIPAR_NDVI_OFFSET)
+    min_fIPAR = T(MIN_FIPAR)
+    max_fIPAR = T(MAX_FIPAR)
+    min_LAI = T(MIN_LAI)
+    max_LAI = T(MAX_LAI)
+    inv_KPAR = T(1.0 / KPAR)
+    KRN_ = T(KRN)
+
+    # hoist the reciprocal of beta out of the pixel loop
+    inv_beta_Pa = one / beta_Pa
+
+    # uniform parameters are read from their first element for every pixel instead of being broadcast
+    epsilon_uniform = epsilon.size == 1
+    gamma_uniform = gamma_Pa.size == 1
+
+    for i in prange(NDVI.size):
+        # every output scales with net radiation, so fill pixels without it are written as NaN
+        # without evaluating the transcendental functions of the chain
+        if math.isnan(Rn[i]):
+            out_Rn_soil[i] = nan
+            out_LE_soil[i] = nan
+            out_Rn_canopy[i] = nan
+            out_PET[i] = nan
+            out_LE_canopy[i] = nan
+            out_LE_interception[i] = nan
+            out_LE[i] = nan
+            continue
+
+        # meteorology
+        Ta = Ta_C[i]
+        rh = _clip(RH[i], zero, one)
+        SVP_Pa, delta_Pa = _SVP_and_delta_Pa_from_Ta_C(Ta)
+        Ea_Pa = rh * SVP_Pa
+        VPD_Pa = _clip_lower(SVP_Pa - Ea_Pa, zero)
+        rh2 = rh * rh
+        fwet = rh2 * rh2
+
+        # vegetation
+        ndvi = NDVI[i]
+        # SAVI and fAPAR from SAVI folded into one affine function of NDVI
+        fAPAR = _clip(ndvi * fAPAR_slope + fAPAR_intercept, zero, one)
+        fIPAR = _clip(ndvi - fIPAR_offset, zero, max_fIPAR_NDVI)
+
+        # pixels without intercepted PAR or without maximum fAPAR have no defined canopy constraints,
+        # so they're flagged once and masked at the end instead of carrying NaN through the chain
+        canopy_valid = fIPAR > zero and fAPARmax[i] > zero
+        # fAPAR is clipped to be non-negative and both denominators are floored above zero,
+        # so the ratios only need their upper bound
+        fg = _clip_upper(fAPAR / _clip_lower(fIPAR, tiny), one)
+        fM = _clip_upper(fAPAR / _clip_lower(fAPARmax[i], tiny), one)
+
+        # RH ** (VPD / beta) as exp(log(RH) * VPD / beta), with RH floored to keep log finite
+        fSM = _clip(math.exp(math.log(max(rh, tiny)) * VPD_Pa * inv_beta_Pa), zero, one)
+
+        # optimum temperature
+        Topt_i = Topt[i]
+
+        if floor_Topt and Ta > Topt_i:
+            Topt_i = Ta
+
+        Topt_i = _clip_lower(Topt_i, minimum_Topt)
+        d = (Ta - Topt_i) / Topt_i
+        fT = math.exp(-(d * d))
+
+        # leaf area index
+        fIPAR_LAI = _clip(ndvi - fIPAR_offset, min_fIPAR, max_fIPAR)
+
+        if fIPAR_LAI == zero:
+            fIPAR_LAI = nan
+
+        LAI = _clip(-math.log(one - fIPAR_LAI) * inv_KPAR, min_LAI, max_LAI)
+
+        # delta / (delta + gamma)
+        if epsilon_given:
+            eps = epsilon[0] if epsilon_uniform else epsilon[i]
+        else:
+            eps = delta_Pa / (delta_Pa + (gamma_Pa[0] if gamma_uniform else gamma_Pa[i]))
+
+        # terms shared by the potential and partitioned fluxes
+        PT_eps = PT_alpha * eps
+        one_minus_fwet = one - fwet
+
+        # net radiation reaching the soil, with the canopy share taken from expm1
+        # so that it doesn't cancel against Rn in single precision when LAI is small
+        attenuation = -KRN_ * LAI
+        Rn_soil = Rn[i] * math.exp(attenuation)
+        Rn_canopy = -Rn[i] * math.expm1(attenuation)
+
+        # soil evaporation
+        LE_soil = _clip_lower((fwet + fSM * one_minus_fwet) * PT_eps * (Rn_soil - G[i]), zero)
+
+        # canopy transpiration
+        PET = PT_eps * (Rn[i] - G[i])
+        LE_canopy = _clip_lower(one_minus_fwet * fg * fT * fM * PT_eps * Rn_canopy, zero)
+
+        if not canopy_valid:
+            LE_canopy = nan
+
+        # interception evaporation
+        LE_interception = _clip_lower(fwet * PT_eps * Rn_canopy, zero)
+
+        # combined evapotranspiration, constrained between zero and potential evapotranspiration
+        LE = _clip(LE_soil + LE_canopy + LE_interception, zero, PET)
+
+        out_Rn_soil[i] = Rn_soil
+        out_LE_soil[i] = LE_soil
+        out_Rn_canopy[i] = Rn_canopy
+        out_PET[i] = PET
+        out_LE_canopy[i] = LE_canopy
+        out_LE_interception[i] = LE_interception
+        out_LE[i] = LE
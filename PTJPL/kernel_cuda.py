@@ -0,0 +1,185 @@
+from typing import Dict
+from functools import lru_cache
+import numpy as np
+
+from .constants import KRN
+from .meteorology_conversion.meteorology_conversion import SVP_A_KPA, SVP_B, SVP_C
+from .priestley_taylor.priestley_taylor import DELTA_A, DELTA_B_KPA, DELTA_E
+from .vegetation_conversion.vegetation_conversion import KPAR, MIN_FIPAR, MAX_FIPAR, MIN_LAI, MAX_LAI, FAPAR_SLOPE, FAPAR_INTERCEPT, FIPAR_NDVI_OFFSET
+
+# CuPy is optional, the GPU path is only taken when inputs are already CuPy arrays
+try:
+    import cupy as cp
+except ImportError:
+    cp = None
+
+
+def is_cupy_array(*arrays) -> bool:
+    """
+    Check if any of the given inputs is a CuPy array resident on the GPU.
+    """
+    return cp is not None and any(isinstance(array, cp.ndarray) for array in arrays)
+
+
+def _clip(x, lower, upper):
+    # element-wise equivalent of np.clip that passes NaN through
+    x = cp.where(x < lower, lower, x)
+
+    return cp.where(x > upper, upper, x)
+
+
+def _clip_lower(x, lower):
+    # one-sided clip that passes NaN through
+    return cp.where(x < lower, lower, x)
+
+
+def _clip_upper(x, upper):
+    # one-sided clip that passes NaN through
+    return cp.where(x > upper, upper, x)
+
+
+@lru_cache(maxsize=None)
+def _fused_kernel(dtype: type):
+    # one fused CUDA kernel per precision, with its constants built in that precision as they are in _ptjpl_kernel,
+    # since Python float constants would be double precision inside the kernel
+    T = dtype
+    zero = T(0.0)
+    one = T(1.0)
+    tiny = T(1e-30)
+    nan = T(np.nan)
+    thousand = T(1000.0)
+    SVP_A = T(SVP_A_KPA)
+    SVP_B_ = T(SVP_B)
+    SVP_C_ = T(SVP_C)
+    DELTA_A_ = T(DELTA_A)
+    DELTA_B = T(DELTA_B_KPA)
+    DELTA_E_ = T(DELTA_E)
+    fAPAR_slope = T(FAPAR_SLOPE)
+    fAPAR_intercept = T(FAPAR_INTERCEPT)
+    fIPAR_offset = T(FIPAR_NDVI_OFFSET)
+    max_fIPAR_NDVI = T(1.0 - FIPAR_NDVI_OFFSET)
+    min_fIPAR = T(MIN_FIPAR)
+    max_fIPAR = T(MAX_FIPAR)
+    min_LAI = T(MIN_LAI)
+    max_LAI = T(MAX_LAI)
+    inv_KPAR = T(1.0 / KPAR)
+    KRN_ = T(KRN)
+
+    def _ptjpl(NDVI, Ta_C, RH, Rn, G, Topt, fAPARmax, epsilon, epsilon_given, gamma_Pa, beta_Pa, PT_alpha, minimum_Topt, floor_Topt):
+        # meteorology
+        rh = _clip(RH, zero, one)
+
+        # saturation vapor pressure and its slope share one exponential
+        exponential = cp.exp((Ta_C * SVP_B_) / (Ta_C + SVP_C_))
+        SVP_Pa = _clip_lower(SVP_A * exponential, one) * thousand
+        offset = Ta_C + DELTA_E_
+        delta_Pa = DELTA_A_ * (DELTA_B * exponential) / (offset * offset) * thousand
+
+        VPD_Pa = _clip_lower(SVP_Pa - rh * SVP_Pa, zero)
+        rh2 = rh * rh
+        fwet = rh2 * rh2
+
+        # vegetation
+        fAPAR = _clip(NDVI * fAPAR_slope + fAPAR_intercept, zero, one)
+        fIPAR = _clip(NDVI - fIPAR_offset, zero, max_fIPAR_NDVI)
+        canopy_valid = (fIPAR > zero) & (fAPARmax > zero)
+        fg = _clip_upper(fAPAR / _clip_lower(fIPAR, tiny), one)
+        fM = _clip_upper(fAPAR / _clip_lower(fAPARmax, tiny), one)
+        fSM = _clip(cp.exp(cp.log(_clip_lower(rh, tiny)) * VPD_Pa * (one / beta_Pa)), zero, one)
+
+        # optimum temperature
+        Topt = cp.where((floor_Topt != zero) & (Ta_C > Topt), Ta_C, Topt)
+        Topt = _clip_lower(Topt, minimum_Topt)
+        d = (Ta_C - Topt) / Topt
+        fT = cp.exp(-(d * d))
+
+        # leaf area index
+        fIPAR_LAI = _clip(NDVI - fIPAR_offset, min_fIPAR, max_fIPAR)
+        fIPAR_LAI = cp.where(fIPAR_LAI == zero, nan, fIPAR_LAI)
+        LAI = _clip(-cp.log(one - fIPAR_LAI) * inv_KPAR, min_LAI, max_LAI)
+
+        # delta / (delta + gamma)
+        epsilon = cp.where(epsilon_given != zero, epsilon, delta_Pa / (delta_Pa + gamma_Pa))
+
+        # terms shared by the potential and partitioned fluxes
+        PT_eps = PT_alpha * epsilon
+        one_minus_fwet = one - fwet
+
+        # net radiation reaching the soil, with the canopy share taken from expm1 as in _ptjpl_kernel
+        attenuation = -KRN_ * LAI
+        Rn_soil = Rn * cp.exp(attenuation)
+        Rn_canopy = -Rn * cp.expm1(attenuation)
+
+        # soil evaporation
+        LE_soil = _clip_lower((fwet + fSM * one_minus_fwet) * PT_eps * (Rn_soil - G), zero)
+
+        # canopy transpiration
+        PET = PT_eps * (Rn - G)
+        LE_canopy = _clip_lower(one_minus_fwet * fg * fT * fM * PT_eps * Rn_canopy, zero)
+        LE_canopy = cp.where(canopy_valid, LE_canopy, nan)
+
+        # interception evaporation
+        LE_interception = _clip_lower(fwet * PT_eps * Rn_canopy, zero)
+
+        # combined evapotranspiration, constrained between zero and potential evapotranspiration
+        LE = _clip(LE_soil + LE_canopy + LE_interception, zero, PET)
+
+        return Rn_soil, LE_soil, Rn_canopy, PET, LE_canopy, LE_interception, LE
+
+    # fuse the chain into a single CUDA kernel so no intermediate device arrays are allocated
+    return cp.fuse(kernel_name=f"ptjpl_{np.dtype(dtype).name}")(_ptjpl)
+
+
+def process_PTJPL_CUDA(
+        NDVI,
+        Ta_C,
+        RH,
+        Rn,
+        G,
+        Topt,
+        fAPARmax,
+        epsilon,
+        gamma_Pa,
+        beta_Pa: float,
+        PT_alpha: float,
+        minimum_Topt: float,
+        floor_Topt: bool,
+        output_names: list,
+        dtype: type = np.float32) -> Dict:
+    """
+    Run the PT-JPL partitioning on the GPU as one fused CuPy kernel.
+
+    This mirrors the Numba kernel in `kernel.py` pixel for pixel. Inputs are moved to the device
+    as arrays of `dtype`, float32 by default, and outputs stay on the device as CuPy arrays.
+    `epsilon` is calculated from `Ta_C` and `gamma_Pa` when it's not given.
+    """
+    dtype = cp.dtype(dtype).type
+
+    NDVI, Ta_C, RH, Rn, G, Topt, fAPARmax = cp.broadcast_arrays(*[
+        cp.asarray(array, dtype=dtype)
+        for array
+        in (NDVI, Ta_C, RH, Rn, G, Topt, fAPARmax)
+    ])
+
+    epsilon_given = epsilon is not None
+    epsilon = cp.asarray(epsilon if epsilon_given else 0.0, dtype=dtype)
+    gamma_Pa = cp.asarray(gamma_Pa, dtype=dtype)
+
+    outputs = _fused_kernel(dtype)(
+        NDVI,
+        Ta_C,
+        RH,
+        Rn,
+        G,
+        Topt,
+        fAPARmax,
+        epsilon,
+        dtype(epsilon_given),
+        gamma_Pa,
+        dtype(beta_Pa),
+        dtype(PT_alpha),
+        dtype(minimum_Topt),
+        dtype(bool(floor_Topt))
+    )
+
+    return dict(zip(output_names, outputs))
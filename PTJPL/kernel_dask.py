@@ -0,0 +1,127 @@
+from typing import Dict, Tuple
+from functools import partial
+import numpy as np
+
+from .kernel import OUTPUT_NAMES, flatten_inputs, _ptjpl_kernel
+
+# Dask is optional, the chunked path is only taken when inputs are Dask arrays or chunks are requested
+try:
+    import dask.array as da
+except ImportError:
+    da = None
+
+
+def is_dask_array(*arrays) -> bool:
+    """
+    Check if any of the given inputs is a lazy Dask array.
+    """
+    return da is not None and any(isinstance(array, da.Array) for array in arrays)
+
+
+def _ptjpl_block(
+        NDVI: np.ndarray,
+        Ta_C: np.ndarray,
+        RH: np.ndarray,
+        Rn: np.ndarray,
+        G: np.ndarray,
+        Topt: np.ndarray,
+        fAPARmax: np.ndarray,
+        epsilon: np.ndarray,
+        gamma_Pa: np.ndarray,
+        epsilon_given: bool,
+        beta_Pa: float,
+        PT_alpha: float,
+        minimum_Topt: float,
+        floor_Topt: bool,
+        dtype: type) -> np.ndarray:
+    # run the fused kernel over one block, writing the outputs into the rows of a single stacked array
+    shape, inputs = flatten_inputs(NDVI, Ta_C, RH, Rn, G, Topt, fAPARmax, epsilon, gamma_Pa, dtype=dtype, uniform=(7, 8))
+    outputs = np.empty((len(OUTPUT_NAMES), inputs[0].size), dtype=dtype)
+
+    _ptjpl_kernel(
+        *inputs[:8],
+        epsilon_given,
+        inputs[8],
+        np.dtype(dtype).type(beta_Pa),
+        np.dtype(dtype).type(PT_alpha),
+        np.dtype(dtype).type(minimum_Topt),
+        floor_Topt,
+        *outputs
+    )
+
+    return outputs.reshape((len(OUTPUT_NAMES),) + shape)
+
+
+def process_PTJPL_dask(
+        NDVI,
+        Ta_C,
+        RH,
+        Rn,
+        G,
+        Topt,
+        fAPARmax,
+        epsilon,
+        gamma_Pa,
+        beta_Pa: float,
+        PT_alpha: float,
+        minimum_Topt: float,
+        floor_Topt: bool,
+        output_names: list,
+        chunks: Tuple[int, ...] = None,
+        dtype: type = np.float32,
+        compute: bool = False) -> Dict:
+    """
+    Run the PT-JPL partitioning block by block over Dask arrays.
+
+    Every step of the partitioning is element-wise, so each block runs through the fused Numba kernel in `kernel.py`
+    independently, with temporaries the size of a block rather than the size of the scene.
+    In-memory inputs are broadcast to the common shape as views and split into blocks of `chunks`,
+    Dask inputs keep their own chunks unless `chunks` is given.
+    `epsilon` is calculated from `Ta_C` and `gamma_Pa` when it's not given.
+    Blocks are calculated in `dtype`, float32 or float64.
+    Outputs are lazy Dask arrays unless `compute` is true, in which case they're computed together into ndarrays.
+    """
+    if da is None:
+        raise ImportError("processing PT-JPL in chunks requires Dask, install it with the dask extra: pip install PTJPL[dask]")
+
+    epsilon_given = epsilon is not None
+    inputs = [NDVI, Ta_C, RH, Rn, G, Topt, fAPARmax, epsilon if epsilon_given else 0.0, gamma_Pa]
+    shape = np.broadcast_shapes(*[np.shape(array) for array in inputs])
+
+    if chunks is None:
+        # follow the chunks of the first Dask input
+        chunks = next(da.broadcast_to(array, shape).chunks for array in inputs if isinstance(array, da.Array))
+
+    inputs = [
+        da.broadcast_to(array, shape).rechunk(chunks)
+        if isinstance(array, da.Array)
+        # uniform epsilon and gamma are passed to every block as a single value
+        else np.asarray(array).item()
+        if index >= 7 and np.size(array) == 1
+        # broadcast views of scalars and smaller arrays are only copied one block at a time
+        else da.from_array(np.broadcast_to(array, shape), chunks=chunks)
+        for index, array
+        in enumerate(inputs)
+    ]
+
+    # the dtype keyword of map_blocks sets the output dtype, so the block's dtype is bound separately
+    stacked = da.map_blocks(
+        partial(_ptjpl_block, dtype=dtype),
+        *inputs,
+        epsilon_given=epsilon_given,
+        beta_Pa=float(beta_Pa),
+        PT_alpha=float(PT_alpha),
+        minimum_Topt=float(minimum_Topt),
+        floor_Topt=bool(floor_Topt),
+        new_axis=0,
+        chunks=((len(OUTPUT_NAMES),),) + inputs[0].chunks,
+        dtype=dtype
+    )
+
+    outputs = [stacked[index] for index in range(len(output_names))]
+
+    # the outputs share one graph, so computing them together runs the kernel once per block
+    if compute:
+        outputs = da.compute(*outputs)
+
+    return dict(zip(output_names, outputs))
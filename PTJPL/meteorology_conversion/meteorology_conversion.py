@@ -1,8 +1,13 @@
-from typing import Union
+from typing import Union, Tuple
 import numpy as np
+from numba import vectorize, float32, float64
 import rasters as rt
 from rasters import Raster
 
+from ..evaluate import evaluate
+from ..precision import as_dtype
+from ..priestley_taylor.priestley_taylor import DELTA_A, DELTA_B_KPA, DELTA_E
+
 # gas constant for dry air in joules per kilogram per kelvin
 RD = 286.9
 
@@ -15,6 +20,30 @@ CPW = 1846.0
 # specific heat of dry air in joules per kilogram per kelvin
 CPD = 1005.0
 
+# coefficients of the Magnus-Tetens saturation vapor pressure formula, SVP = A * exp(B * T / (T + C))
+# these are kept as Python floats, which NumPy treats as weak scalars,
+# so float32 inputs stay in float32 and float64 inputs keep the exact coefficients
+SVP_A_KPA = 0.611
+SVP_B = 17.27
+SVP_C = 237.7
+
+# the humidity and air density formulas are compiled into ufuncs, so each helper is one dispatch
+# and one pass over the arrays without intermediate arrays, which dominates on small arrays,
+# while broadcasting and the wrapping of rasters are still handled by NumPy
+@vectorize([float32(float32, float32), float64(float64, float64)], cache=True)
+def _specific_humidity(Ea_Pa, Ps_Pa):
+    return (0.622 * Ea_Pa) / (Ps_Pa - (0.387 * Ea_Pa))
+
+@vectorize([float32(float32), float64(float64)], cache=True)
+def _specific_heat(specific_humidity):
+    return specific_humidity * CPW + (1 - specific_humidity) * CPD
+
+@vectorize([float32(float32, float32, float32), float64(float64, float64, float64)], cache=True)
+def _air_density(surface_pressure_Pa, Ta_K, specific_humidity):
+    rhoD = surface_pressure_Pa / (RD * Ta_K)
+
+    return rhoD * ((1.0 + specific_humidity) / (1.0 + specific_humidity * (RW / RD)))
+
 def kelvin_to_celsius(T_K: Union[Raster, np.ndarray]) -> Union[Raster, np.ndarray]:
     """
     convert temperature in kelvin to celsius.
@@ -33,32 +62,39 @@ def celcius_to_kelvin(T_C: Union[Raster, np.ndarray]) -> Union[Raster, np.ndarra
 
 def calculate_specific_humidity(
         Ea_Pa: Union[Raster, np.ndarray], 
-        Ps_Pa: Union[Raster, np.ndarray]) -> Union[Raster, np.ndarray]:
+        Ps_Pa: Union[Raster, np.ndarray],
+        dtype: type = None) -> Union[Raster, np.ndarray]:
     """
     Calculate the specific humidity of air as a ratio of kilograms of water to kilograms of air.
     
     Args:
         Ea_Pa (Union[Raster, np.ndarray]): Actual water vapor pressure in Pascal.
         surface_pressure_Pa (Union[Raster, np.ndarray]): Surface pressure in Pascal.
+        dtype (type, optional): Precision of the calculation, such as np.float32. Defaults to None, which keeps the input precision.
     
     Returns:
         Union[Raster, np.ndarray]: Specific humidity in kilograms of water per kilograms of air.
     """
-    return ((0.622 * Ea_Pa) / (Ps_Pa - (0.387 * Ea_Pa)))
+    Ea_Pa = as_dtype(Ea_Pa, dtype)
+    Ps_Pa = as_dtype(Ps_Pa, dtype)
 
-def calculate_specific_heat(specific_humidity: Union[Raster, np.ndarray]):
+    return _specific_humidity(Ea_Pa, Ps_Pa)
+
+def calculate_specific_heat(specific_humidity: Union[Raster, np.ndarray], dtype: type = None):
     # calculate specific heat capacity of the air (Cp)
     # in joules per kilogram per kelvin
     # from specific heat of water vapor (CPW)
     # and specific heat of dry air (CPD)
-    Cp_Jkg = specific_humidity * CPW + (1 - specific_humidity) * CPD
+    specific_humidity = as_dtype(specific_humidity, dtype)
+    Cp_Jkg = _specific_heat(specific_humidity)
 
     return Cp_Jkg
 
 def calculate_air_density(
         surface_pressure_Pa: Union[Raster, np.ndarray], 
         Ta_K: Union[Raster, np.ndarray], 
-        specific_humidity: Union[Raster, np.ndarray]) -> Union[Raster, np.ndarray]:
+        specific_humidity: Union[Raster, np.ndarray],
+        dtype: type = None) -> Union[Raster, np.ndarray]:
     """
     Calculate air density.
 
@@ -66,58 +102,140 @@ def calculate_air_density(
     surface_pressure_Pa (Union[Raster, np.ndarray]): Surface pressure in Pascal.
     Ta_K (Union[Raster, np.ndarray]): Air temperature in Kelvin.
     specific_humidity (Union[Raster, np.ndarray]): Specific humidity.
+    dtype (type, optional): Precision of the calculation, such as np.float32. Defaults to None, which keeps the input precision.
 
     Returns:
     Union[Raster, np.ndarray]: Air density in kilograms per cubic meter.
     """
-    # numerator: Pa(N / m ^ 2 = kg * m / s ^ 2); denominator: J / kg / K * K)
-    rhoD = surface_pressure_Pa / (RD * Ta_K)
+    surface_pressure_Pa = as_dtype(surface_pressure_Pa, dtype)
+    Ta_K = as_dtype(Ta_K, dtype)
+    specific_humidity = as_dtype(specific_humidity, dtype)
 
-    # calculate air density (rho) in kilograms per cubic meter
-    rho = rhoD * ((1.0 + specific_humidity) / (1.0 + specific_humidity * (RW / RD)))
+    # dry air density from the ideal gas law, numerator: Pa(N / m ^ 2 = kg * m / s ^ 2); denominator: J / kg / K * K),
+    # corrected for moisture to air density (rho) in kilograms per cubic meter
+    rho = _air_density(surface_pressure_Pa, Ta_K, specific_humidity)
 
     return rho
 
-def SVP_kPa_from_Ta_C(Ta_C: Union[Raster, np.ndarray]) -> Union[Raster, np.ndarray]:
+def SVP_kPa_from_Ta_C(Ta_C: Union[Raster, np.ndarray], dtype: type = None) -> Union[Raster, np.ndarray]:
     """
     Calculate the saturation vapor pressure in kiloPascal (kPa) from air temperature in Celsius.
 
     Parameters:
     Ta_C (Union[Raster, np.ndarray]): Air temperature in Celsius.
+    dtype (type, optional): Precision of the calculation, such as np.float32. Defaults to None, which keeps the input precision.
 
     Returns:
     Union[Raster, np.ndarray]: Saturation vapor pressure in kPa.
 
     """
-    SVP_kPa = np.clip(0.611 * np.exp((Ta_C * 17.27) / (Ta_C + 237.7)), 1, None)
+    Ta_C = as_dtype(Ta_C, dtype)
+
+    # evaluate the exponential and the floor at one kiloPascal in a single pass without intermediate arrays
+    SVP_kPa = evaluate(
+        "SVP_A_KPA * exp((Ta_C * SVP_B) / (Ta_C + SVP_C))",
+        lower=1,
+        Ta_C=Ta_C,
+        SVP_A_KPA=SVP_A_KPA,
+        SVP_B=SVP_B,
+        SVP_C=SVP_C
+    )
 
     return SVP_kPa
 
-def SVP_Pa_from_Ta_C(Ta_C: Union[Raster, np.ndarray]) -> Union[Raster, np.ndarray]:
+def SVP_Pa_from_Ta_C(Ta_C: Union[Raster, np.ndarray], dtype: type = None) -> Union[Raster, np.ndarray]:
     """
     Calculate the saturation vapor pressure in Pascal (Pa) from the air temperature in Celsius (Ta_C).
 
     Parameters:
         Ta_C (Union[Raster, np.ndarray]): Air temperature in Celsius.
+        dtype (type, optional): Precision of the calculation, such as np.float32. Defaults to None, which keeps the input precision.
 
     Returns:
         Union[Raster, np.ndarray]: Saturation vapor pressure in Pascal (Pa).
     """
-    return SVP_kPa_from_Ta_C(Ta_C) * 1000
+    return SVP_kPa_from_Ta_C(Ta_C, dtype=dtype) * 1000
 
-def calculate_surface_pressure(elevation_m: Union[Raster, np.ndarray], Ta_C: Union[Raster, np.ndarray]) -> Union[Raster, np.ndarray]:
+def SVP_and_delta_Pa_from_Ta_C(
+        Ta_C: Union[Raster, np.ndarray],
+        dtype: type = None) -> Tuple[Union[Raster, np.ndarray], Union[Raster, np.ndarray]]:
+    """
+    Calculate the saturation vapor pressure and the slope of the saturation vapor pressure curve in Pascal
+    from air temperature in Celsius.
+
+    Both share the exponential of the Magnus-Tetens formula, with the same coefficients in the exponent,
+    so it's evaluated once for the pair instead of once in `SVP_Pa_from_Ta_C` and again in `delta_Pa_from_Ta_C`.
+
+    Parameters:
+        Ta_C (Union[Raster, np.ndarray]): Air temperature in Celsius.
+        dtype (type, optional): Precision of the calculation, such as np.float32. Defaults to None, which keeps the input precision.
+
+    Returns:
+        Tuple[Union[Raster, np.ndarray], Union[Raster, np.ndarray]]:
+        Saturation vapor pressure in Pascal, floored at one kiloPascal,
+        and its slope in Pascal per degree Celsius.
+    """
+    Ta_C = as_dtype(Ta_C, dtype)
+    exponential = evaluate("exp((Ta_C * SVP_B) / (Ta_C + SVP_C))", Ta_C=Ta_C, SVP_B=SVP_B, SVP_C=SVP_C)
+
+    SVP_Pa = evaluate(
+        "SVP_A_KPA * exponential",
+        lower=1,
+        exponential=exponential,
+        SVP_A_KPA=SVP_A_KPA
+    ) * 1000
+
+    delta_Pa = evaluate(
+        "DELTA_A * (DELTA_B_KPA * exponential) / (Ta_C + DELTA_E) ** 2 * 1000",
+        exponential=exponential,
+        Ta_C=Ta_C,
+        DELTA_A=DELTA_A,
+        DELTA_B_KPA=DELTA_B_KPA,
+        DELTA_E=DELTA_E
+    )
+
+    return SVP_Pa, delta_Pa
+
+def calculate_surface_pressure(
+        elevation_m: Union[Raster, np.ndarray],
+        Ta_C: Union[Raster, np.ndarray] = None,
+        dtype: type = None,
+        Ta_K: Union[Raster, np.ndarray] = None) -> Union[Raster, np.ndarray]:
     """
     Calculate surface pressure using elevation and air temperature.
 
     Parameters:
         elevation_m (Union[Raster, np.ndarray]): Elevation in meters.
-        Ta_K (Union[Raster, np.ndarray]): Air temperature in Kelvin.
+        Ta_C (Union[Raster, np.ndarray]): Air temperature in Celsius.
+        dtype (type, optional): Precision of the calculation, such as np.float32. Defaults to None, which keeps the input precision.
+        Ta_K (Union[Raster, np.ndarray], optional): Air temperature in Kelvin,
+            for callers that have already converted it. Used instead of Ta_C when given.
 
     Returns:
         Union[Raster, np.ndarray]: Surface pressure in Pascal (Pa).
     """
-    Ta_K = kelvin_to_celsius(Ta_C)
-    Ps_Pa = 101325.0 * (1.0 - 0.0065 * elevation_m / Ta_K) ** (9.807 / (0.0065 * 287.0))  # [Pa]
+    if Ta_C is None and Ta_K is None:
+        raise ValueError("air temperature (Ta_C or Ta_K) not given")
+
+    elevation_m = as_dtype(elevation_m, dtype)
+
+    # convert Celsius to Kelvin within the expression instead of in a separate pass
+    if Ta_K is None:
+        Ta_K = as_dtype(Ta_C, dtype)
+        offset = 273.15
+    else:
+        Ta_K = as_dtype(Ta_K, dtype)
+        offset = 0.0
+
+    # the barometric power law as exp(exponent * log1p(x)) instead of pow, which is cheaper and more accurate near one
+    Ps_Pa = evaluate(
+        "101325 * exp(exponent * log1p(-lapse_rate * elevation_m / (Ta_K + offset)))",
+        elevation_m=elevation_m,
+        Ta_K=Ta_K,
+        offset=offset,
+        lapse_rate=0.0065,
+        exponent=9.807 / (0.0065 * 287.0)
+    )  # [Pa]
 
     return Ps_Pa
 
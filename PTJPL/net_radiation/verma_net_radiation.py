@@ -4,7 +4,19 @@ import numpy as np
 import rasters as rt
 from rasters import Raster
 
+from ..evaluate import evaluate
+
 STEFAN_BOLTZMAN_CONSTANT = 5.67036713e-8  # SI units watts per square meter per kelvin to the fourth
+KELVIN_OFFSET = 273.15
+
+# water vapor pressure as EA_A_PA * 10 ** (7.5 * Ta_C / (Ta_C + EA_C)), written with a natural exponential
+EA_A_PA = 611.3
+EA_B = 7.5 * np.log(10)
+EA_C = 273.15 - 35.85
+
+# coefficients of atmospheric emissivity from water vapor pressure and air temperature
+ETA1_SCALE = 0.465
+ETA2_A = 1.2
 
 
 def daylight_from_SHA(SHA_deg: Union[Raster, np.ndarray]) -> Union[Raster, np.ndarray]:
@@ -41,34 +53,38 @@ def day_angle_rad_from_doy(doy: Union[Raster, np.ndarray]) -> Union[Raster, np.n
 def SHA_deg_from_doy_lat(doy: Union[Raster, np.ndarray, int], latitude: np.ndarray) -> Raster:
     """
     This function calculates sunrise hour angle in degrees from latitude in degrees and day of year between 1 and 365.
+    Day of year and latitude are broadcast against each other, so a column of latitudes
+    with a scalar or a row of days gives the full grid without materializing grid-sized temporaries.
     """
+    template = next((value for value in (latitude, doy) if isinstance(value, Raster)), None)
+    doy = doy.array if isinstance(doy, Raster) else doy
+    latitude = latitude.array if isinstance(latitude, Raster) else latitude
+
     # calculate day angle in radians
     day_angle_rad = day_angle_rad_from_doy(doy)
 
     # calculate solar declination in degrees
     solar_dec_deg = solar_dec_deg_from_day_angle_rad(day_angle_rad)
 
-    # convert latitude to radians
-    latitude_rad = np.radians(latitude)
-
     # convert solar declination to radians
     solar_dec_rad = np.radians(solar_dec_deg)
 
-    # calculate cosine of sunrise angle at latitude and solar declination
-    # need to keep the cosine for polar correction
-    sunrise_cos = -np.tan(latitude_rad) * np.tan(solar_dec_rad)
+    # calculate cosine of sunrise angle at latitude and solar declination,
+    # allocating the broadcast output once and working on it in place from here
+    sunrise_cos = np.asarray(np.multiply(-np.tan(np.radians(latitude)), np.tan(solar_dec_rad)))
 
-    # calculate sunrise angle in radians from cosine
-    with warnings.catch_warnings():
-        warnings.filterwarnings("ignore")
-        sunrise_rad = np.arccos(sunrise_cos)
+    # apply polar correction by constraining the cosine to the domain of arccos,
+    # so polar day gives an angle of 180 and polar night gives an angle of 0
+    np.clip(sunrise_cos, -1, 1, out=sunrise_cos)
+
+    # calculate sunrise angle from cosine and convert to degrees
+    sunrise_deg = np.degrees(np.arccos(sunrise_cos, out=sunrise_cos), out=sunrise_cos)
 
-    # convert to degrees
-    sunrise_deg = np.degrees(sunrise_rad)
+    if sunrise_deg.ndim == 0:
+        return sunrise_deg[()]
 
-    # apply polar correction
-    sunrise_deg = rt.where(sunrise_cos >= 1, 0, sunrise_deg)
-    sunrise_deg = rt.where(sunrise_cos <= -1, 180, sunrise_deg)
+    if template is not None:
+        sunrise_deg = template.contain(sunrise_deg)
 
     return sunrise_deg
 
@@ -79,61 +95,92 @@ def process_verma_net_radiation(
         emissivity: np.ndarray,
         Ta_C: np.ndarray,
         RH: np.ndarray,
-        cloud_mask: np.ndarray = None) -> Dict:
+        cloud_mask: np.ndarray = None,
+        return_components: bool = True) -> Dict:
+    # passing return_components=False skips keeping incoming and outgoing longwave,
+    # calculating net longwave without their two raster-sized arrays
     results = {}
 
-    # Convert surface temperature from Celsius to Kelvin
-    ST_K = ST_C + 273.15
+    # constrain albedo between 0 and 1 and calculate outgoing shortwave from incoming shortwave and albedo
+    SWout = evaluate(
+        "SWin * where(albedo < 0, 0, where(albedo > 1, 1, albedo))",
+        lower=0,
+        SWin=SWin,
+        albedo=albedo
+    )
 
-    # Convert air temperature from Celsius to Kelvin
-    Ta_K = Ta_C + 273.15
-
-    # Calculate water vapor pressure in Pascals using air temperature and relative humidity
-    Ea_Pa = (RH * 0.6113 * (10 ** (7.5 * (Ta_K - 273.15) / (Ta_K - 35.85)))) * 1000
-    
-    # constrain albedo between 0 and 1
-    albedo = np.clip(albedo, 0, 1)
-
-    # calculate outgoing shortwave from incoming shortwave and albedo
-    SWout = np.clip(SWin * albedo, 0, None)
     results["SWout"] = SWout
 
-    # calculate instantaneous net radiation from components
-    SWnet = np.clip(SWin - SWout, 0, None)
+    # calculate water vapor pressure in Pascals using air temperature and relative humidity,
+    # with the power of ten taken as an exponential and the Kelvin offsets folded into the denominator,
+    # then the emissivity term of the atmosphere from vapor pressure and air temperature in Kelvin
+    eta1 = evaluate(
+        "ETA1_SCALE * (RH * EA_A_PA * exp(EA_B * Ta_C / (Ta_C + EA_C))) / (Ta_C + KELVIN_OFFSET)",
+        RH=RH,
+        Ta_C=Ta_C,
+        ETA1_SCALE=ETA1_SCALE,
+        EA_A_PA=EA_A_PA,
+        EA_B=EA_B,
+        EA_C=EA_C,
+        KELVIN_OFFSET=KELVIN_OFFSET
+    )
 
     # calculate atmospheric emissivity
-    eta1 = 0.465 * Ea_Pa / Ta_K
-    # atmospheric_emissivity = (1 - (1 + eta1) * np.exp(-(1.2 + 3 * eta1) ** 0.5))
-    eta2 = -(1.2 + 3 * eta1) ** 0.5
-    eta2 = eta2.astype(float)
-    eta3 = np.exp(eta2)
-    atmospheric_emissivity = np.where(eta2 != 0, (1 - (1 + eta1) * eta3), np.nan)
+    # the exponent is a negative square root, so exp never divides by zero and needs no guard,
+    # and negative radicands from invalid humidity pass through as NaN
+    atmospheric_emissivity = "(1 - (1 + eta1) * exp(-sqrt(ETA2_A + 3 * eta1)))"
+
+    # black body radiation of the air, with the fourth power of air temperature expanded into multiplies by numexpr
+    LW_air = "STEFAN_BOLTZMAN_CONSTANT * (Ta_C + KELVIN_OFFSET) ** 4"
 
     if cloud_mask is None:
         # calculate incoming longwave for clear sky
-        LWin = atmospheric_emissivity * STEFAN_BOLTZMAN_CONSTANT * Ta_K ** 4
+        LWin_expression = f"{atmospheric_emissivity} * {LW_air}"
     else:
         # calculate incoming longwave for clear sky and cloudy
-        LWin = np.where(
-            ~cloud_mask,
-            atmospheric_emissivity * STEFAN_BOLTZMAN_CONSTANT * Ta_K ** 4,
-            STEFAN_BOLTZMAN_CONSTANT * Ta_K ** 4
-        )
-    
-    results["LWin"] = LWin
-
-    # constrain emissivity between 0 and 1
-    emissivity = np.clip(emissivity, 0, 1)
+        LWin_expression = f"where(cloud_mask, 1, {atmospheric_emissivity}) * {LW_air}"
+
+    # constrain emissivity between 0 and 1 and calculate outgoing longwave from land surface temperature and emissivity
+    LWout_expression = (
+        "where(emissivity < 0, 0, where(emissivity > 1, 1, emissivity)) * STEFAN_BOLTZMAN_CONSTANT * (ST_C + KELVIN_OFFSET) ** 4"
+    )
+
+    LW_arrays = dict(
+        cloud_mask=cloud_mask,
+        eta1=eta1,
+        Ta_C=Ta_C,
+        emissivity=emissivity,
+        ST_C=ST_C,
+        ETA2_A=ETA2_A,
+        STEFAN_BOLTZMAN_CONSTANT=STEFAN_BOLTZMAN_CONSTANT,
+        KELVIN_OFFSET=KELVIN_OFFSET
+    )
+
+    if return_components:
+        LWin = evaluate(LWin_expression, **LW_arrays)
+        results["LWin"] = LWin
+
+        LWout = evaluate(LWout_expression, **LW_arrays)
+        results["LWout"] = LWout
+
+        LWnet_expression = "where(LWin - LWout < 0, 0, LWin - LWout)"
+        LWnet_arrays = dict(LWin=LWin, LWout=LWout)
+    else:
+        # calculate net longwave in one pass without keeping incoming and outgoing longwave
+        LWnet = evaluate(f"{LWin_expression} - {LWout_expression}", lower=0, **LW_arrays)
 
-    # calculate outgoing longwave from land surface temperature and emissivity
-    LWout = emissivity * STEFAN_BOLTZMAN_CONSTANT * ST_K ** 4
-    results["LWout"] = LWout
+        LWnet_expression = "LWnet"
+        LWnet_arrays = dict(LWnet=LWnet)
 
-    # LWnet = np.clip(LWin - LWout, 0, None)
-    LWnet = np.clip(LWin - LWout, 0, None)
+    # calculate instantaneous net radiation from net shortwave and net longwave, each constrained to be non-negative,
+    # so their sum needs no further constraint
+    Rn = evaluate(
+        f"where(SWin - SWout < 0, 0, SWin - SWout) + {LWnet_expression}",
+        SWin=SWin,
+        SWout=SWout,
+        **LWnet_arrays
+    )
 
-    # constrain negative values of instantaneous net radiation
-    Rn = np.clip(SWnet + LWnet, 0, None)
     results["Rn"] = Rn
 
     return results
@@ -153,6 +200,7 @@ def daily_Rn_integration_verma(
     to get the total amount of energy transferred, factor seconds out of joules
     the number of seconds for which this average is representative is (daylight_hours * 3600)
     documented in verma et al, bisht et al, and lagouARDe et al
+    lat can be given as a column of latitudes to broadcast against the rows of Rn
     :param Rn:
     :param hour_of_day:
     :param sunrise_hour:
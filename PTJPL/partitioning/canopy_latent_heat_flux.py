@@ -4,6 +4,7 @@ import rasters as rt
 from rasters import Raster
 
 from ..constants import PT_ALPHA
+from ..evaluate import evaluate
 
 def calculate_canopy_latent_heat_flux(
         Rn_canopy: Union[Raster, np.ndarray],
@@ -12,7 +13,9 @@ def calculate_canopy_latent_heat_flux(
         fg: Union[Raster, np.ndarray],
         fT: Union[Raster, np.ndarray],
         fM: Union[Raster, np.ndarray],
-        PT_alpha: float = PT_ALPHA) -> Union[Raster, np.ndarray]:
+        PT_alpha: float = PT_ALPHA,
+        PT_eps: Union[Raster, np.ndarray] = None,
+        out: Union[Raster, np.ndarray] = None) -> Union[Raster, np.ndarray]:
     """
     Calculate the latent heat flux from the canopy (LEc) using the Priestley-Taylor equation, 
     considering various environmental and plant physiological factors.
@@ -34,10 +37,28 @@ def calculate_canopy_latent_heat_flux(
         soil moisture availability on plant transpiration.
     PT_alpha (float, optional): The Priestley-Taylor alpha constant. It is a dimensionless 
         empirical parameter typically equal to 1.26. Defaults to PT_ALPHA.
+    PT_eps (Union[Raster, np.ndarray], optional): Precomputed PT_alpha * epsilon shared 
+        with the other partitioned fluxes. When given, it's used in place of PT_alpha and epsilon.
+    out (Union[Raster, np.ndarray], optional): Preallocated array to write the result into instead of allocating one.
 
     Returns:
     Union[Raster, np.ndarray]: The calculated latent heat flux from the canopy (LEc) in 
         watts per square meter. Represents the energy associated with the evapotranspiration 
         process from the canopy.
     """
-    return rt.clip(PT_alpha * (1 - fwet) * fg * fT * fM * epsilon * Rn_canopy, 0, None)
+    # PT_alpha * epsilon can be passed in precomputed when it's shared between the partitioned fluxes
+    PT_epsilon = "PT_alpha * epsilon" if PT_eps is None else "PT_eps"
+
+    return evaluate(
+        f"(1 - fwet) * fg * fT * fM * {PT_epsilon} * Rn_canopy",
+        lower=0,
+        Rn_canopy=Rn_canopy,
+        epsilon=epsilon,
+        fwet=fwet,
+        fg=fg,
+        fT=fT,
+        fM=fM,
+        PT_alpha=PT_alpha,
+        PT_eps=PT_eps,
+        out=out
+    )
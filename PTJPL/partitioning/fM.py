@@ -18,4 +18,21 @@ def calculate_plant_moisture_constraint(
     Returns:
     Union[Raster, np.ndarray]: The plant moisture constraint, calculated as the ratio of fAPAR to fAPARmax. The result is a Raster object if the inputs are Raster objects, otherwise it is a numpy array.
     """
-    return np.where(fAPARmax > 0, np.clip(fAPAR / fAPARmax, 0.0, 1.0), np.nan)
+    geometry = next((array.geometry for array in (fAPAR, fAPARmax) if isinstance(array, Raster)), None)
+    fAPAR_array = np.asarray(fAPAR.array if isinstance(fAPAR, Raster) else fAPAR)
+    fAPARmax_array = np.asarray(fAPARmax.array if isinstance(fAPARmax, Raster) else fAPARmax)
+
+    # divide only where fAPARmax is positive into a NaN-filled output, so there's no separate mask and select pass,
+    # then clip the ratio to [0, 1] in place
+    fM = np.full(
+        np.broadcast_shapes(fAPAR_array.shape, fAPARmax_array.shape),
+        np.nan,
+        dtype=np.result_type(fAPAR_array, fAPARmax_array, np.float32)
+    )
+    np.divide(fAPAR_array, fAPARmax_array, out=fM, where=fAPARmax_array > 0)
+    np.clip(fM, 0.0, 1.0, out=fM)
+
+    if geometry is not None:
+        fM = Raster(fM, geometry=geometry)
+
+    return fM
@@ -4,6 +4,7 @@ import rasters as rt
 from rasters import Raster
 
 from ..constants import BETA_PA
+from ..evaluate import evaluate
 
 def calculate_soil_moisture_constraint(
         RH: Union[Raster, np.ndarray], 
@@ -25,4 +26,14 @@ def calculate_soil_moisture_constraint(
     Returns:
     Union[Raster, np.ndarray]: The calculated soil moisture constraint. The output type matches the input type (Raster or numpy array).
     """
-    return rt.clip(RH ** (VPD_Pa / beta_Pa), 0.0, 1.0)
+    # RH ** (VPD / beta) as exp(log(RH) * VPD / beta) with the reciprocal of beta hoisted,
+    # RH floored to keep log finite while passing NaN through, and the clip applied in the same pass
+    return evaluate(
+        "exp(log(where(RH < RH_floor, RH_floor, RH)) * VPD_Pa * inv_beta_Pa)",
+        lower=0.0,
+        upper=1.0,
+        RH=RH,
+        VPD_Pa=VPD_Pa,
+        RH_floor=1e-30,
+        inv_beta_Pa=1.0 / beta_Pa
+    )
@@ -3,6 +3,8 @@ import numpy as np
 import rasters as rt
 from rasters import Raster
 
+from ..evaluate import evaluate
+
 def calculate_plant_temperature_constraint(
         Ta_C: Union[Raster, np.ndarray], 
         Topt: Union[Raster, np.ndarray]) -> Union[Raster, np.ndarray]:
@@ -18,4 +20,10 @@ def calculate_plant_temperature_constraint(
     Returns:
     Union[Raster, np.ndarray]: The calculated plant temperature constraint. The return type will match the input type (Raster or numpy array).
     """
-    return np.exp(-(((Ta_C - Topt) / Topt) ** 2))
+    # relative departure from the optimum, squared and exponentiated in a single pass without temporaries,
+    # numexpr lowers the constant square to a multiply rather than pow and uses VML for exp when it's available
+    return evaluate(
+        "exp(-((Ta_C - Topt) / Topt) ** 2)",
+        Ta_C=Ta_C,
+        Topt=Topt
+    )
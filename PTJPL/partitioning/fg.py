@@ -23,4 +23,21 @@ def calculate_green_canopy_fraction(
     Returns:
         Union[Raster, np.ndarray]: The calculated green-canopy fraction. The return type matches the input type.
     """
-    return rt.where(fIPAR > 0, np.clip(fAPAR / fIPAR, 0.0, 1.0), np.nan)
+    geometry = next((array.geometry for array in (fAPAR, fIPAR) if isinstance(array, Raster)), None)
+    fAPAR_array = np.asarray(fAPAR.array if isinstance(fAPAR, Raster) else fAPAR)
+    fIPAR_array = np.asarray(fIPAR.array if isinstance(fIPAR, Raster) else fIPAR)
+
+    # divide only where fIPAR is positive into a NaN-filled output, so there's no separate mask and select pass,
+    # then clip the ratio to [0, 1] in place
+    fg = np.full(
+        np.broadcast_shapes(fAPAR_array.shape, fIPAR_array.shape),
+        np.nan,
+        dtype=np.result_type(fAPAR_array, fIPAR_array, np.float32)
+    )
+    np.divide(fAPAR_array, fIPAR_array, out=fg, where=fIPAR_array > 0)
+    np.clip(fg, 0.0, 1.0, out=fg)
+
+    if geometry is not None:
+        fg = Raster(fg, geometry=geometry)
+
+    return fg
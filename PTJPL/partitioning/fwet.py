@@ -3,7 +3,11 @@ import numpy as np
 import rasters as rt
 from rasters import Raster
 
-def calculate_relative_surface_wetness(RH: Union[Raster, np.ndarray]) -> Union[Raster, np.ndarray]:
+from ..precision import as_dtype
+
+def calculate_relative_surface_wetness(
+        RH: Union[Raster, np.ndarray],
+        dtype: type = None) -> Union[Raster, np.ndarray]:
     """
     This function calculates the relative surface wetness based on the input relative humidity.
 
@@ -15,6 +19,8 @@ def calculate_relative_surface_wetness(RH: Union[Raster, np.ndarray]) -> Union[R
     RH : Union[Raster, np.ndarray]
         The relative humidity as a raster or numpy array. The values should be in the range [0, 1], 
         where 0 represents no humidity and 1 represents 100% humidity.
+    dtype : type, optional
+        Precision of the calculation, such as np.float32. Defaults to None, which keeps the input precision.
 
     Returns
     -------
@@ -27,6 +33,14 @@ def calculate_relative_surface_wetness(RH: Union[Raster, np.ndarray]) -> Union[R
     ValueError
         If any value in the RH raster or numpy array is not in the range [0, 1].
     """
-    if np.any((RH < 0) | (RH > 1)):
+    RH = as_dtype(RH, dtype)
+    values = RH.array if isinstance(RH, Raster) else RH
+
+    # check the range with two NaN-skipping reductions instead of building and reducing a boolean array
+    if np.fmin.reduce(values, axis=None, initial=np.inf) < 0 or np.fmax.reduce(values, axis=None, initial=-np.inf) > 1:
         raise ValueError("Relative humidity values should be in the range [0, 1].")
-    return RH ** 4
+
+    # fourth power as two squarings instead of a call to pow
+    RH2 = RH * RH
+
+    return RH2 * RH2
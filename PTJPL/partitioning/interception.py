@@ -5,12 +5,15 @@ import rasters as rt
 from rasters import Raster
 
 from ..constants import PT_ALPHA
+from ..evaluate import evaluate
 
 def calculate_interception(
         Rn_canopy: Union[Raster, np.ndarray],
         epsilon: Union[Raster, np.ndarray],
         fwet: Union[Raster, np.ndarray],
-        PT_alpha: float = PT_ALPHA) -> Union[Raster, np.ndarray]:
+        PT_alpha: float = PT_ALPHA,
+        PT_eps: Union[Raster, np.ndarray] = None,
+        out: Union[Raster, np.ndarray] = None) -> Union[Raster, np.ndarray]:
     """
     Calculates the PT-JPL interception evaporation (LEi) based on the relative surface wetness and the net radiation of the canopy.
 
@@ -29,8 +32,23 @@ def calculate_interception(
         This represents the proportion of the surface that is wet.
     PT_alpha (float, optional): The Priestley-Taylor alpha constant. This is a dimensionless empirical parameter, 
         typically equal to 1.26. Defaults to PT_ALPHA.
+    PT_eps (Union[Raster, np.ndarray], optional): Precomputed PT_alpha * epsilon shared with the other partitioned fluxes. 
+        When given, it's used in place of PT_alpha and epsilon.
+    out (Union[Raster, np.ndarray], optional): Preallocated array to write the result into instead of allocating one.
 
     Returns:
     Union[Raster, np.ndarray]: The calculated interception evaporation (LEi), given in the same units as the input parameters.
     """
-    return rt.clip(fwet * PT_alpha * epsilon * Rn_canopy, 0, None)
+    # PT_alpha * epsilon can be passed in precomputed when it's shared between the partitioned fluxes
+    PT_epsilon = "PT_alpha * epsilon" if PT_eps is None else "PT_eps"
+
+    return evaluate(
+        f"fwet * {PT_epsilon} * Rn_canopy",
+        lower=0,
+        Rn_canopy=Rn_canopy,
+        epsilon=epsilon,
+        fwet=fwet,
+        PT_alpha=PT_alpha,
+        PT_eps=PT_eps,
+        out=out
+    )
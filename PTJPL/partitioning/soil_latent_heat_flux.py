@@ -4,6 +4,7 @@ import rasters as rt
 from rasters import Raster
 
 from ..constants import PT_ALPHA
+from ..evaluate import evaluate
 
 def calculate_soil_latent_heat_flux(
         Rn_soil: Union[Raster, np.ndarray], 
@@ -11,7 +12,9 @@ def calculate_soil_latent_heat_flux(
         epsilon: Union[Raster, np.ndarray], 
         fwet: Union[Raster, np.ndarray], 
         fSM: Union[Raster, np.ndarray], 
-        PT_alpha: float = PT_ALPHA) -> Union[Raster, np.ndarray]:
+        PT_alpha: float = PT_ALPHA,
+        PT_eps: Union[Raster, np.ndarray] = None,
+        out: Union[Raster, np.ndarray] = None) -> Union[Raster, np.ndarray]:
     """
     Calculate the Priestley-Taylor Jet Propulsion Laboratory (PT-JPL) soil latent heat flux.
 
@@ -22,10 +25,27 @@ def calculate_soil_latent_heat_flux(
     fwet (Union[Raster, np.ndarray]): The relative surface wetness. It ranges from 0 (completely dry) to 1 (completely wet).
     fSM (Union[Raster, np.ndarray]): The soil moisture constraint. It represents the effect of soil moisture on evapotranspiration.
     PT_alpha (float, optional): The Priestley-Taylor alpha constant. It is a dimensionless empirical parameter typically equal to 1.26. Defaults to PT_ALPHA.
+    PT_eps (Union[Raster, np.ndarray], optional): Precomputed PT_alpha * epsilon shared with the other partitioned fluxes. When given, it's used in place of PT_alpha and epsilon.
+    out (Union[Raster, np.ndarray], optional): Preallocated array to write the result into instead of allocating one.
 
     Returns:
     Union[Raster, np.ndarray]: The calculated soil latent heat flux in watts per square meter (W/m^2). It represents the energy associated with the phase change of water in the soil.
 
     The function uses the PT-JPL model to estimate the soil latent heat flux based on the input parameters. The calculation is clipped at zero to avoid negative values which are physically meaningless in this context.
     """
-    return np.clip((fwet + fSM * (1 - fwet)) * PT_alpha * epsilon * (Rn_soil - G), 0, None)
+    # PT_alpha * epsilon can be passed in precomputed when it's shared between the partitioned fluxes
+    PT_epsilon = "PT_alpha * epsilon" if PT_eps is None else "PT_eps"
+
+    # the wetness blend fwet + fSM * (1 - fwet) is expanded to fwet + fSM - fwet * fSM, saving the subtraction
+    return evaluate(
+        f"(fwet + fSM - fwet * fSM) * {PT_epsilon} * (Rn_soil - G)",
+        lower=0,
+        Rn_soil=Rn_soil,
+        G=G,
+        epsilon=epsilon,
+        fwet=fwet,
+        fSM=fSM,
+        PT_alpha=PT_alpha,
+        PT_eps=PT_eps,
+        out=out
+    )
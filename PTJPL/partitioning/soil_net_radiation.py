@@ -4,10 +4,14 @@ import rasters as rt
 from rasters import Raster
 
 from ..constants import KRN
+from ..evaluate import evaluate
+from ..precision import as_dtype
 
 def calculate_soil_net_radiation(
         Rn: Union[Raster, np.ndarray], 
-        LAI: Union[Raster, np.ndarray]) -> Union[Raster, np.ndarray]:
+        LAI: Union[Raster, np.ndarray],
+        dtype: type = None,
+        out: np.ndarray = None) -> Union[Raster, np.ndarray]:
     """
     Calculate the soil net radiation based on the total net radiation and leaf area index.
 
@@ -16,6 +20,8 @@ def calculate_soil_net_radiation(
     Parameters:
     Rn (Union[Raster, np.ndarray]): The total net radiation. It can be a Raster object or a numpy ndarray.
     LAI (Union[Raster, np.ndarray]): The leaf area index. It can be a Raster object or a numpy ndarray.
+    dtype (type, optional): Precision of the calculation, such as np.float32. Defaults to None, which keeps the input precision.
+    out (np.ndarray, optional): Preallocated array to write the result into instead of allocating one.
 
     Returns:
     Union[Raster, np.ndarray]: The soil net radiation. The return type will match the input type.
@@ -23,4 +29,8 @@ def calculate_soil_net_radiation(
     Note:
     The constant KRN from the module constants is used in the calculation, which is a specific extinction coefficient, 0.6.
     """
-    return Rn * np.exp(-KRN * LAI)
+    Rn = as_dtype(Rn, dtype)
+    LAI = as_dtype(LAI, dtype)
+
+    # evaluate the attenuation and the product in a single pass without intermediate arrays
+    return evaluate("Rn * exp(-KRN * LAI)", Rn=Rn, LAI=LAI, KRN=KRN, out=out)
@@ -0,0 +1,30 @@
+from typing import Union
+import numpy as np
+from rasters import Raster
+
+# remote sensing and GEOS-5 FP inputs are single precision, so the raster math defaults to float32
+DEFAULT_DTYPE = np.float32
+
+def as_dtype(
+        array: Union[Raster, np.ndarray, float],
+        dtype: type = DEFAULT_DTYPE) -> Union[Raster, np.ndarray]:
+    """
+    Cast an input to the given floating point precision, keeping rasters as rasters.
+
+    Inputs that are already in the requested dtype are passed through without copying.
+    Passing `dtype=None` leaves the input unchanged.
+
+    Parameters:
+    array (Union[Raster, np.ndarray, float]): Raster, array, or scalar input.
+    dtype (type, optional): Data type to cast to. Defaults to float32.
+
+    Returns:
+    Union[Raster, np.ndarray]: The input in the requested dtype.
+    """
+    if dtype is None:
+        return array
+
+    if isinstance(array, Raster):
+        return array if array.dtype == dtype else array.astype(dtype)
+
+    return np.asarray(array, dtype=dtype)
@@ -3,6 +3,8 @@ import numpy as np
 
 from rasters import Raster
 
+from ..evaluate import evaluate
+
 # psychrometric constant gamma in kiloPascal per degree Celsius
 # same as value for ventilated (Asmann type) psychrometers, with an air movement of some 5 m/s
 # http://www.fao.org/docrep/x0490e/x0490e07.htm
@@ -11,17 +13,47 @@ GAMMA_KPA = 0.0662  # kPa/C
 # psychrometric constant gamma in Pascal per degree Celsius
 GAMMA_PA = GAMMA_KPA * 1000
 
+# coefficients of the slope of the saturation vapor pressure curve,
+# delta = A * B * exp(C * T / (D + T)) / (T + E) ** 2 in kiloPascal per degree Celsius
+# these are kept as Python floats so they follow the dtype of the air temperature input
+DELTA_A = 4098.0
+DELTA_B_KPA = 0.6108
+DELTA_C = 17.27
+DELTA_D = 237.7
+DELTA_E = 237.3
+
 def delta_kPa_from_Ta_C(Ta_C: Union[Raster, np.ndarray]) -> Union[Raster, np.ndarray]:
-    return 4098 * (0.6108 * np.exp(17.27 * Ta_C / (237.7 + Ta_C))) / (Ta_C + 237.3) ** 2
+    return _delta_from_Ta_C(Ta_C, DELTA_B_KPA)
 
 def delta_Pa_from_Ta_C(Ta_C: Union[Raster, np.ndarray]) -> Union[Raster, np.ndarray]:
-    return delta_kPa_from_Ta_C(Ta_C) * 1000
+    # the conversion to Pascal is folded into the coefficient instead of taking another pass
+    return _delta_from_Ta_C(Ta_C, DELTA_B_KPA * 1000)
+
+def _delta_from_Ta_C(Ta_C: Union[Raster, np.ndarray], DELTA_B: float) -> Union[Raster, np.ndarray]:
+    # slope of the saturation vapor pressure curve in a single fused pass, in the units of DELTA_B
+    return evaluate(
+        "DELTA_A * (DELTA_B * exp(DELTA_C * Ta_C / (DELTA_D + Ta_C))) / (Ta_C + DELTA_E) ** 2",
+        Ta_C=Ta_C,
+        DELTA_A=DELTA_A,
+        DELTA_B=DELTA_B,
+        DELTA_C=DELTA_C,
+        DELTA_D=DELTA_D,
+        DELTA_E=DELTA_E
+    )
 
 def calculate_epsilon(delta: Union[Raster, np.ndarray], gamma: Union[Raster, np.ndarray]) -> Union[Raster, np.ndarray]:
-    return delta / (delta + gamma)
+    return evaluate("delta / (delta + gamma)", delta=delta, gamma=gamma)
 
 def epsilon_from_Ta_C(Ta_C: Union[Raster, np.ndarray], gamma_Pa: Union[Raster, np.ndarray, float] = GAMMA_PA) -> Union[Raster, np.ndarray]:
-    delta_Pa = delta_Pa_from_Ta_C(Ta_C)
-    epsilon = calculate_epsilon(delta=delta_Pa, gamma=gamma_Pa)
-
-    return epsilon
+    # delta / (delta + gamma) as 1 / (1 + gamma / delta), so the exponential of delta is evaluated once
+    # in a single pass without materializing delta
+    return evaluate(
+        "1 / (1 + gamma_Pa * (Ta_C + DELTA_E) ** 2 / (DELTA_A * DELTA_B_PA * exp(DELTA_C * Ta_C / (DELTA_D + Ta_C))))",
+        Ta_C=Ta_C,
+        gamma_Pa=gamma_Pa,
+        DELTA_A=DELTA_A,
+        DELTA_B_PA=DELTA_B_KPA * 1000,
+        DELTA_C=DELTA_C,
+        DELTA_D=DELTA_D,
+        DELTA_E=DELTA_E
+    )
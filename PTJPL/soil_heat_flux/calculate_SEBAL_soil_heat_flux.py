@@ -4,6 +4,13 @@ import numpy as np
 import rasters as rt
 from rasters import Raster
 
+from ..evaluate import evaluate
+
+# Empirical coefficients used in the calculation
+SEBAL_G_COEFF1 = 0.0038
+SEBAL_G_COEFF2 = 0.0074
+SEBAL_G_NDVI_COEFF = 0.98
+
 def calculate_SEBAL_soil_heat_flux(
         Rn: Union[Raster, np.ndarray], 
         ST_C: Union[Raster, np.ndarray], 
@@ -25,16 +32,18 @@ def calculate_SEBAL_soil_heat_flux(
     Reference:
     "Evapotranspiration Estimation Based on Remote Sensing and the SEBAL Model in the Bosten Lake Basin of China" [^1^][1]
     """
-    # Empirical coefficients used in the calculation
-    coeff1 = 0.0038
-    coeff2 = 0.0074
-    
-    # Vegetation cover correction factor
-    NDVI_correction = 1 - 0.98 * NDVI ** 4
-    
-    # Calculation of the soil heat flux (G)
-    G = Rn * ST_C * (coeff1 + coeff2 * albedo) * NDVI_correction
-    
-    G = rt.clip(G, 0, None)
+    # Calculation of the soil heat flux (G) in one fused pass,
+    # with the vegetation cover correction's NDVI ** 4 evaluated as two squarings
+    G = evaluate(
+        "Rn * ST_C * (SEBAL_G_COEFF1 + SEBAL_G_COEFF2 * albedo) * (1 - SEBAL_G_NDVI_COEFF * (NDVI * NDVI) * (NDVI * NDVI))",
+        lower=0,
+        Rn=Rn,
+        ST_C=ST_C,
+        NDVI=NDVI,
+        albedo=albedo,
+        SEBAL_G_COEFF1=SEBAL_G_COEFF1,
+        SEBAL_G_COEFF2=SEBAL_G_COEFF2,
+        SEBAL_G_NDVI_COEFF=SEBAL_G_NDVI_COEFF
+    )
 
     return G
@@ -0,0 +1,77 @@
+from typing import Union
+from functools import lru_cache
+from affine import Affine
+import numpy as np
+import rasters as rt
+from rasters import Raster, RasterGeometry, RasterGrid
+
+# number of target grids to keep loaded per static raster
+STATIC_RASTER_CACHE_SIZE = 8
+
+def _read_static_raster(filename: str, geometry: RasterGeometry, scale_factor: float) -> Raster:
+    raw = rt.Raster.open(filename, geometry=geometry, resampling="cubic")
+
+    # point geometries are sampled in a single read and come back as a plain array of values
+    values = raw.array if isinstance(raw, Raster) else np.asarray(raw)
+
+    # scale the stored int16 values straight into single precision instead of promoting to double,
+    # then clip negative values, including the integer fill value, to zero in place
+    array = np.empty(values.shape, dtype=np.float32)
+    np.multiply(values, np.float32(scale_factor), out=array, casting="unsafe")
+    np.maximum(array, 0, out=array)
+
+    if not isinstance(raw, Raster):
+        return array
+
+    return Raster(array, geometry=raw.geometry, nodata=np.nan)
+
+@lru_cache(maxsize=STATIC_RASTER_CACHE_SIZE)
+def _read_static_raster_cached(
+        filename: str,
+        affine: tuple,
+        rows: int,
+        cols: int,
+        crs: str,
+        scale_factor: float) -> Raster:
+    geometry = RasterGrid.from_affine(Affine(*affine[:6]), rows, cols, crs)
+    image = _read_static_raster(filename, geometry, scale_factor)
+
+    # the cached raster is shared between callers, so protect it from modification
+    image.array.flags.writeable = False
+
+    return image
+
+def load_static_raster(filename: str, geometry: RasterGeometry, scale_factor: float) -> Union[Raster, np.ndarray]:
+    """
+    Load one of the static CMG rasters packaged with PT-JPL, resampled to the target geometry and scaled to physical units.
+
+    Rasters loaded to a regular grid are cached by the grid's affine transform, shape, and projection,
+    so repeated runs over the same scene open and resample each static raster once.
+    The cached raster is read-only and shared between calls.
+
+    Parameters:
+    filename (str): Path to the scaled integer GeoTIFF.
+    geometry (RasterGeometry): Target geometry to resample to.
+    scale_factor (float): Factor converting stored integers to physical units.
+
+    Returns:
+    Raster: Scaled float32 raster with negative values clipped to zero and NaN nodata,
+    or an array of sampled values when the target geometry is a set of points.
+    """
+    if isinstance(geometry, RasterGrid):
+        return _read_static_raster_cached(
+            filename,
+            tuple(geometry.affine),
+            geometry.rows,
+            geometry.cols,
+            geometry.crs.to_wkt(),
+            scale_factor
+        )
+
+    return _read_static_raster(filename, geometry, scale_factor)
+
+def clear_static_raster_cache():
+    """
+    Drop the cached static rasters, releasing their memory or forcing them to be read again.
+    """
+    _read_static_raster_cached.cache_clear()
@@ -1,71 +1,281 @@
-from typing import Union
+from typing import Union, Tuple
+import math
 import numpy as np
+from numba import njit, prange, vectorize, void, float32, float64
 import rasters as rt
 from rasters import Raster
 
+from ..evaluate import evaluate
+from ..fastmath import typed_like
+from ..precision import as_dtype
+
 KPAR = 0.5
 MIN_FIPAR = 0.0
 MAX_FIPAR = 1.0
 MIN_LAI = 0.0
 MAX_LAI = 10.0
 
-def FVC_from_NDVI(NDVI: Union[Raster, np.ndarray]) -> Union[Raster, np.ndarray]:
+# NDVI of full vegetation and of bare soil bounding fractional vegetation cover
+NDVI_VEGETATION = 0.52  # +- 0.03
+NDVI_SOIL = 0.04  # +- 0.03
+FVC_SCALE = 1.0 / (NDVI_VEGETATION - NDVI_SOIL)
+
+# NDVI offset of the fraction of intercepted PAR
+FIPAR_NDVI_OFFSET = 0.05
+
+# SAVI = NDVI * SAVI_SLOPE + SAVI_INTERCEPT and fAPAR = SAVI * FAPAR_SAVI_SLOPE + FAPAR_SAVI_INTERCEPT
+SAVI_SLOPE = 0.45
+SAVI_INTERCEPT = 0.132
+FAPAR_SAVI_SLOPE = 1.3632
+FAPAR_SAVI_INTERCEPT = -0.048
+
+# SAVI and fAPAR from SAVI combined into one affine function of NDVI
+FAPAR_SLOPE = SAVI_SLOPE * FAPAR_SAVI_SLOPE
+FAPAR_INTERCEPT = SAVI_INTERCEPT * FAPAR_SAVI_SLOPE + FAPAR_SAVI_INTERCEPT
+
+def FVC_from_NDVI(
+        NDVI: Union[Raster, np.ndarray],
+        dtype: type = None,
+        out: Union[Raster, np.ndarray] = None) -> Union[Raster, np.ndarray]:
     """
     Convert Normalized Difference Vegetation Index (NDVI) to Fractional Vegetation Cover (FVC).
 
     Parameters:
         NDVI (Union[Raster, np.ndarray]): Input NDVI data.
+        dtype (type, optional): Precision of the calculation, such as np.float32. Defaults to None, which keeps the input precision.
+        out (Union[Raster, np.ndarray], optional): Preallocated array to write the result into instead of allocating one, which may be NDVI itself.
 
     Returns:
         Union[Raster, np.ndarray]: Converted FVC data.
     """
-    NDVIv = 0.52  # +- 0.03
-    NDVIs = 0.04  # +- 0.03
-    FVC = rt.clip((NDVI - NDVIs) / (NDVIv - NDVIs), 0.0, 1.0)
+    NDVI = as_dtype(NDVI, dtype)
+
+    # the division by the NDVI range is a multiplication by its precomputed reciprocal, clipped in the same pass
+    FVC = evaluate(
+        "(NDVI - NDVI_SOIL) * FVC_SCALE",
+        lower=0.0,
+        upper=1.0,
+        NDVI=NDVI,
+        NDVI_SOIL=NDVI_SOIL,
+        FVC_SCALE=FVC_SCALE,
+        out=out
+    )
 
     return FVC
 
+# fIPAR, its NaN mask, the logarithm, and both clips are compiled into one ufunc,
+# so LAI is one pass over NDVI without intermediate arrays
+@vectorize([float32(*[float32] * 5), float64(*[float64] * 5)], cache=True)
+def _LAI_from_NDVI(NDVI, min_fIPAR, max_fIPAR, min_LAI, max_LAI):
+    # the offset is taken in the precision of NDVI so that NDVI == 0.05 gives exactly zero fIPAR
+    fIPAR = NDVI - typed_like(NDVI, FIPAR_NDVI_OFFSET)
+
+    # clip while passing NaN through
+    if fIPAR < min_fIPAR:
+        fIPAR = min_fIPAR
+    if fIPAR > max_fIPAR:
+        fIPAR = max_fIPAR
+
+    # pixels without intercepted PAR have no defined leaf area index
+    if fIPAR == typed_like(NDVI, 0.0):
+        return typed_like(NDVI, np.nan)
+
+    # log1p(-fIPAR) keeps precision for the small fIPAR of sparse vegetation
+    LAI = -math.log1p(-fIPAR) * typed_like(NDVI, 1.0 / KPAR)
+
+    if LAI < min_LAI:
+        LAI = min_LAI
+    if LAI > max_LAI:
+        LAI = max_LAI
+
+    return LAI
+
 def LAI_from_NDVI(
         NDVI: Union[Raster, np.ndarray],
         min_fIPAR: float = MIN_FIPAR,
         max_fIPAR: float = MAX_FIPAR,
         min_LAI: float = MIN_LAI,
-        max_LAI: float = MAX_LAI) -> Union[Raster, np.ndarray]:
+        max_LAI: float = MAX_LAI,
+        dtype: type = None,
+        out: np.ndarray = None) -> Union[Raster, np.ndarray]:
     """
     Convert Normalized Difference Vegetation Index (NDVI) to Leaf Area Index (LAI).
 
     Parameters:
         NDVI (Union[Raster, np.ndarray]): Input NDVI data.
+        dtype (type, optional): Precision of the calculation, such as np.float32. Defaults to None, which keeps the input precision.
+        out (np.ndarray, optional): Preallocated array to write the result into instead of allocating one, which may be NDVI itself.
 
     Returns:
         Union[Raster, np.ndarray]: Converted LAI data.
     """
-    fIPAR = rt.clip(NDVI - 0.05, min_fIPAR, max_fIPAR)
-    fIPAR = np.where(fIPAR == 0, np.nan, fIPAR)
-    LAI = rt.clip(-np.log(1 - fIPAR) * (1 / KPAR), min_LAI, max_LAI)
+    NDVI = as_dtype(NDVI, dtype)
 
-    return LAI
+    # comparing fill values raises the invalid flag and full fIPAR the divide flag,
+    # NaN is passed through and the infinite LAI is clipped to max_LAI
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return _LAI_from_NDVI(NDVI, min_fIPAR, max_fIPAR, min_LAI, max_LAI, out=out)
 
-def SAVI_from_NDVI(NDVI: Union[Raster, np.ndarray]) -> Union[Raster, np.ndarray]:
+def SAVI_from_NDVI(
+        NDVI: Union[Raster, np.ndarray],
+        dtype: type = None,
+        out: Union[Raster, np.ndarray] = None) -> Union[Raster, np.ndarray]:
     """
     Linearly calculates Soil-Adjusted Vegetation Index from ST_K.
     :param NDVI: normalized difference vegetation index clipped between 0 and 1
+    :param dtype: precision of the calculation, such as np.float32, None by default to keep the input precision
+    :param out: preallocated array to write the result into instead of allocating one, which may be the input itself
     :return: soil-adjusted vegetation index
     """
-    return NDVI * 0.45 + 0.132
+    NDVI = as_dtype(NDVI, dtype)
+
+    return evaluate(
+        "NDVI * SAVI_SLOPE + SAVI_INTERCEPT",
+        NDVI=NDVI,
+        SAVI_SLOPE=SAVI_SLOPE,
+        SAVI_INTERCEPT=SAVI_INTERCEPT,
+        out=out
+    )
 
-def fAPAR_from_SAVI(SAVI: Union[Raster, np.ndarray]) -> Union[Raster, np.ndarray]:
+def fAPAR_from_SAVI(
+        SAVI: Union[Raster, np.ndarray],
+        dtype: type = None,
+        out: Union[Raster, np.ndarray] = None) -> Union[Raster, np.ndarray]:
     """
     Linearly calculates fraction of absorbed photosynthetically active radiation from soil-adjusted vegetation index.
     :param SAVI: soil adjusted vegetation index
+    :param dtype: precision of the calculation, such as np.float32, None by default to keep the input precision
+    :param out: preallocated array to write the result into instead of allocating one, which may be the input itself
+    :return: fraction of absorbed photosynthetically active radiation
+    """
+    SAVI = as_dtype(SAVI, dtype)
+
+    return evaluate(
+        "SAVI * FAPAR_SAVI_SLOPE + FAPAR_SAVI_INTERCEPT",
+        lower=0,
+        upper=1,
+        SAVI=SAVI,
+        FAPAR_SAVI_SLOPE=FAPAR_SAVI_SLOPE,
+        FAPAR_SAVI_INTERCEPT=FAPAR_SAVI_INTERCEPT,
+        out=out
+    )
+
+def fAPAR_from_NDVI(
+        NDVI: Union[Raster, np.ndarray],
+        dtype: type = None,
+        out: Union[Raster, np.ndarray] = None) -> Union[Raster, np.ndarray]:
+    """
+    Linearly calculates fraction of absorbed photosynthetically active radiation from normalized difference vegetation index,
+    equivalent to fAPAR_from_SAVI(SAVI_from_NDVI(NDVI)) in a single pass.
+    :param NDVI: normalized difference vegetation index
+    :param dtype: precision of the calculation, such as np.float32, None by default to keep the input precision
+    :param out: preallocated array to write the result into instead of allocating one, which may be the input itself
     :return: fraction of absorbed photosynthetically active radiation
     """
-    return rt.clip(SAVI * 1.3632 + -0.048, 0, 1)
+    NDVI = as_dtype(NDVI, dtype)
+
+    return evaluate(
+        "NDVI * FAPAR_SLOPE + FAPAR_INTERCEPT",
+        lower=0,
+        upper=1,
+        NDVI=NDVI,
+        FAPAR_SLOPE=FAPAR_SLOPE,
+        FAPAR_INTERCEPT=FAPAR_INTERCEPT,
+        out=out
+    )
 
-def fIPAR_from_NDVI(NDVI: Union[Raster, np.ndarray]) -> Union[Raster, np.ndarray]:
+def fIPAR_from_NDVI(
+        NDVI: Union[Raster, np.ndarray],
+        dtype: type = None,
+        out: Union[Raster, np.ndarray] = None) -> Union[Raster, np.ndarray]:
     """
     Calculate fraction of intercepted photosynthetically active radiation from normalized difference vegetation index
     :param NDVI: normalized difference vegetation index
+    :param dtype: precision of the calculation, such as np.float32, None by default to keep the input precision
+    :param out: preallocated array to write the result into instead of allocating one, which may be the input itself
     :return: fraction of intercepted photosynthetically active radiation
     """
-    return rt.clip(rt.clip(NDVI, 0, 1) - 0.05, 0, 1)
+    NDVI = as_dtype(NDVI, dtype)
+
+    # clipping NDVI to [0, 1] before the offset and the result to [0, 1] after it
+    # is the same as clipping NDVI - 0.05 to [0, 0.95] once
+    return evaluate(
+        "NDVI - FIPAR_NDVI_OFFSET",
+        lower=0.0,
+        upper=1.0 - FIPAR_NDVI_OFFSET,
+        NDVI=NDVI,
+        FIPAR_NDVI_OFFSET=FIPAR_NDVI_OFFSET,
+        out=out
+    )
+
+# SAVI, fAPAR, and fIPAR are written in one parallel loop that reads each NDVI value once
+@njit(
+    [void(*[float32[::1]] * 4), void(*[float64[::1]] * 4)],
+    parallel=True,
+    nogil=True,
+    cache=True
+)
+def _vegetation_indices(NDVI, SAVI, fAPAR, fIPAR):
+    # constants in the precision of NDVI, so float32 pixels are calculated and clipped in float32
+    T = NDVI.dtype.type
+    zero = T(0.0)
+    one = T(1.0)
+    savi_slope = T(SAVI_SLOPE)
+    savi_intercept = T(SAVI_INTERCEPT)
+    fapar_slope = T(FAPAR_SAVI_SLOPE)
+    fapar_intercept = T(FAPAR_SAVI_INTERCEPT)
+    fipar_offset = T(FIPAR_NDVI_OFFSET)
+    max_fipar = T(1.0 - FIPAR_NDVI_OFFSET)
+
+    for i in prange(NDVI.size):
+        ndvi = NDVI[i]
+        savi = ndvi * savi_slope + savi_intercept
+        SAVI[i] = savi
+
+        # clips pass NaN through
+        fapar = savi * fapar_slope + fapar_intercept
+
+        if fapar < zero:
+            fapar = zero
+        if fapar > one:
+            fapar = one
+
+        fAPAR[i] = fapar
+
+        fipar = ndvi - fipar_offset
+
+        if fipar < zero:
+            fipar = zero
+        if fipar > max_fipar:
+            fipar = max_fipar
+
+        fIPAR[i] = fipar
+
+def vegetation_indices(
+        NDVI: Union[Raster, np.ndarray],
+        dtype: type = None) -> Tuple[Union[Raster, np.ndarray], Union[Raster, np.ndarray], Union[Raster, np.ndarray]]:
+    """
+    Calculate soil-adjusted vegetation index, fraction of absorbed photosynthetically active radiation,
+    and fraction of intercepted photosynthetically active radiation from normalized difference vegetation index in one pass,
+    equivalent to SAVI_from_NDVI, fAPAR_from_SAVI, and fIPAR_from_NDVI.
+    :param NDVI: normalized difference vegetation index
+    :param dtype: precision of the calculation, float32 or float64, None by default to keep the input precision
+    :return: tuple of SAVI, fAPAR, and fIPAR
+    """
+    NDVI = as_dtype(NDVI, dtype)
+    values = NDVI.array if isinstance(NDVI, Raster) else np.asarray(NDVI)
+    # the loop is compiled for single and double precision, other inputs are calculated in double precision
+    flat = np.ascontiguousarray(values, dtype=values.dtype if values.dtype in (np.float32, np.float64) else np.float64).ravel()
+    outputs = np.empty((3, flat.size), dtype=flat.dtype)
+    _vegetation_indices(flat, *outputs)
+
+    # scalar inputs give scalar results, as they do in NumPy
+    if values.ndim == 0:
+        return tuple(output[0] for output in outputs)
+
+    SAVI, fAPAR, fIPAR = [output.reshape(values.shape) for output in outputs]
+
+    if isinstance(NDVI, Raster):
+        return NDVI.contain(SAVI), NDVI.contain(fAPAR), NDVI.contain(fIPAR)
+
+    return SAVI, fAPAR, fIPAR
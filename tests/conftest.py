@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+SIZE = 20000
+
+
+@pytest.fixture
+def inputs():
+    rng = np.random.default_rng(0)
+
+    inputs = {
+        "NDVI": rng.uniform(-0.1, 1.1, SIZE),
+        "Ta_C": rng.uniform(-10, 40, SIZE),
+        "RH": rng.uniform(0, 1, SIZE),
+        "Rn": rng.uniform(0, 800, SIZE),
+        "G": rng.uniform(0, 100, SIZE),
+        "Topt": rng.uniform(0, 40, SIZE),
+        "fAPARmax": rng.uniform(0, 1, SIZE)
+    }
+
+    # edges of the clipping and masking in the chain
+    inputs["NDVI"][:50] = 0.05
+    inputs["NDVI"][50:100] = 1.05
+    inputs["fAPARmax"][100:150] = 0
+    inputs["RH"][150:200] = 0
+    inputs["RH"][200:250] = 1
+
+    # fill values
+    for index, name in enumerate(inputs):
+        inputs[name][300 + index * 10:310 + index * 10] = np.nan
+
+    return inputs
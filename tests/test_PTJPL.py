@@ -0,0 +1,90 @@
+import numpy as np
+import rasters as rt
+
+from PTJPL import PTJPL, OUTPUT_NAMES
+from PTJPL.constants import PT_ALPHA, BETA_PA, MINIMUM_TOPT, KRN
+from PTJPL.priestley_taylor import GAMMA_PA
+
+
+def element_wise_PTJPL(NDVI, Ta_C, RH, Rn, G, Topt, fAPARmax):
+    # the element-wise formulas of the original implementation, frozen here in plain NumPy as the oracle,
+    # so that a regression in any of the helpers the fused kernel replaced can't pass unnoticed
+
+    # meteorology
+    SVP_Pa = np.clip(0.611 * np.exp((Ta_C * 17.27) / (Ta_C + 237.7)), 1, None) * 1000
+    RH = rt.clip(RH, 0, 1)
+    Ea_Pa = RH * SVP_Pa
+    VPD_Pa = rt.clip(SVP_Pa - Ea_Pa, 0, None)
+    fwet = RH ** 4
+
+    # vegetation
+    SAVI = NDVI * 0.45 + 0.132
+    fAPAR = rt.clip(SAVI * 1.3632 + -0.048, 0, 1)
+    fIPAR = rt.clip(rt.clip(NDVI, 0, 1) - 0.05, 0, 1)
+    fIPAR = np.where(fIPAR == 0, np.nan, fIPAR)
+    fg = rt.where(fIPAR > 0, np.clip(fAPAR / fIPAR, 0.0, 1.0), np.nan)
+    fM = np.where(fAPARmax > 0, np.clip(fAPAR / fAPARmax, 0.0, 1.0), np.nan)
+    fSM = rt.clip(RH ** (VPD_Pa / BETA_PA), 0.0, 1.0)
+
+    # optimum temperature
+    Topt = rt.clip(rt.where(Ta_C > Topt, Ta_C, Topt), MINIMUM_TOPT, None)
+    fT = np.exp(-(((Ta_C - Topt) / Topt) ** 2))
+
+    # leaf area index
+    fIPAR_LAI = rt.clip(NDVI - 0.05, 0.0, 1.0)
+    fIPAR_LAI = np.where(fIPAR_LAI == 0, np.nan, fIPAR_LAI)
+    LAI = rt.clip(-np.log(1 - fIPAR_LAI) * (1 / 0.5), 0.0, 10.0)
+
+    # delta / (delta + gamma)
+    delta_Pa = 4098 * (0.6108 * np.exp(17.27 * Ta_C / (237.7 + Ta_C))) / (Ta_C + 237.3) ** 2 * 1000
+    epsilon = delta_Pa / (delta_Pa + GAMMA_PA)
+
+    # partitioning
+    Rn_soil = Rn * np.exp(-KRN * LAI)
+    LE_soil = np.clip((fwet + fSM * (1 - fwet)) * PT_ALPHA * epsilon * (Rn_soil - G), 0, None)
+    Rn_canopy = Rn - Rn_soil
+    PET = PT_ALPHA * epsilon * (Rn - G)
+    LE_canopy = rt.clip(PT_ALPHA * (1 - fwet) * fg * fT * fM * epsilon * Rn_canopy, 0, None)
+    LE_interception = rt.clip(fwet * PT_ALPHA * epsilon * Rn_canopy, 0, None)
+    LE = np.clip(LE_soil + LE_canopy + LE_interception, 0, PET)
+
+    return {
+        "Rn_soil": Rn_soil,
+        "LE_soil": LE_soil,
+        "Rn_canopy": Rn_canopy,
+        "PET": PET,
+        "LE_canopy": LE_canopy,
+        "LE_interception": LE_interception,
+        "LE": LE
+    }
+
+
+def test_fused_kernel_matches_element_wise_chain(inputs):
+    # no GEOS-5 FP data is retrieved when all the inputs are given
+    results = PTJPL(**inputs, GEOS5FP_connection=object(), dtype=np.float64)
+    # the original formulas divide by zero fAPARmax and take the logarithm of zero at full fIPAR
+    with np.errstate(divide="ignore"):
+        expected = element_wise_PTJPL(**inputs)
+
+    for name in OUTPUT_NAMES:
+        result = np.asarray(results[name])
+
+        assert result.dtype == np.float64, name
+        np.testing.assert_array_equal(np.isnan(result), np.isnan(expected[name]), err_msg=name)
+        np.testing.assert_allclose(result, expected[name], rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=name)
+
+
+def test_single_precision_default_stays_close_to_double_precision(inputs):
+    # the default single precision run is bounded against the double precision formulas in W/m^2,
+    # with fluxes close to zero covered by the absolute tolerance
+    results = PTJPL(**inputs, GEOS5FP_connection=object())
+
+    with np.errstate(divide="ignore"):
+        expected = element_wise_PTJPL(**inputs)
+
+    for name in OUTPUT_NAMES:
+        result = np.asarray(results[name])
+
+        assert result.dtype == np.float32, name
+        np.testing.assert_array_equal(np.isnan(result), np.isnan(expected[name]), err_msg=name)
+        np.testing.assert_allclose(result, expected[name], rtol=1e-4, atol=1e-3, equal_nan=True, err_msg=name)
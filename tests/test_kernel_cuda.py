@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from PTJPL import PTJPL, OUTPUT_NAMES
+
+cp = pytest.importorskip("cupy")
+
+
+def gpu_available() -> bool:
+    try:
+        return cp.cuda.runtime.getDeviceCount() > 0
+    except cp.cuda.runtime.CUDARuntimeError:
+        return False
+
+
+@pytest.mark.skipif(not gpu_available(), reason="no CUDA device")
+@pytest.mark.parametrize("dtype, rtol, atol", [(np.float64, 1e-9, 1e-9), (np.float32, 1e-4, 1e-2)])
+def test_CUDA_kernel_matches_numba_kernel(inputs, dtype, rtol, atol):
+    # the CuPy kernel mirrors the Numba kernel pixel for pixel, including its NaN mask
+    expected = PTJPL(**inputs, GEOS5FP_connection=object(), dtype=dtype)
+    device_inputs = {name: cp.asarray(array) for name, array in inputs.items()}
+    results = PTJPL(**device_inputs, GEOS5FP_connection=object(), dtype=dtype)
+
+    for name in OUTPUT_NAMES:
+        assert isinstance(results[name], cp.ndarray), name
+        result = cp.asnumpy(results[name])
+
+        assert result.dtype == dtype, name
+        np.testing.assert_array_equal(np.isnan(result), np.isnan(expected[name]), err_msg=name)
+        np.testing.assert_allclose(result, expected[name], rtol=rtol, atol=atol, equal_nan=True, err_msg=name)